@@ -24,11 +24,26 @@ int dribbleOn = 1600;
 int dribbleOff = 1500;
 
 // IR SENSOR PARAMETERS
+int irState = -1; // last reported reading, -1 before the first report
+uint32_t heartbeatPreviousTime = 0; // in milliseconds
+uint32_t heartbeatInterval = 100; // in milliseconds
+
+// FRAMES SENT TO THE HOST (see src/Client/Controllers/ArduinoProtocol.py)
+//   sync, type, length, payload, checksum (xor of type, length and payload)
+static byte frameSync = 0xAA;
+static byte frameIr = 0x01;
+static byte frameHeartbeat = 0x02;
+static byte frameAck = 0x03;
+static byte ackBusy = 0; // the command was ignored
+static byte ackDone = 1; // the command was carried out
 
 // function statement for compiling
 bool checkPinStatusBool(bool, uint32_t, uint32_t, uint32_t); 
 int checkPinStatusInt(int, uint32_t, uint32_t, uint32_t);
 void parseMessage(char *, int, uint32_t);
+void sendFrame(byte, byte *, byte);
+void sendBallState(byte, bool, uint32_t);
+void sendAck(char, uint16_t, byte, uint32_t);
 
 void setup() {
   Serial.begin(115200); // set baudrate to 19200
@@ -62,7 +77,14 @@ void loop() {
   }
 
   int sensorValue = digitalRead(irInputPin);
-  Serial.println(sensorValue);
+  if(sensorValue != irState) { // only report changes of the IR sensor
+    irState = sensorValue;
+    sendBallState(frameIr, irState == LOW, currentTime); // LOW: the ball blocks the IR beam
+  }
+  if(currentTime - heartbeatPreviousTime >= heartbeatInterval) { // let the host know we are alive
+    heartbeatPreviousTime = currentTime;
+    sendBallState(frameHeartbeat, irState == LOW, currentTime);
+  }
   
   digitalWrite(kickOutputPin, kickPinStatus);
   esc.writeMicroseconds(dribblePinStatus);
@@ -71,42 +93,86 @@ void loop() {
 void parseMessage(char * message, int length, uint32_t currentTime) {
   /*
   * parseMessage(char *, char, int)
-  *    converts the serial input buffer into digital outputs
+  *    converts the serial input buffer into digital outputs and acknowledges the command
   * args:
-  *   message (char *): entire serial input buffer
+  *   message (char *): entire serial input buffer, a command letter followed by its id, e.g. "K42"
   *   length (int): length of the buffer
   *   currentTime (uint32_t): now (in milliseconds)
   */
 
-  char response[256];
   char command = message[0];
+  uint16_t id = length > 1 ? (uint16_t)atol(message + 1) : 0; // 0: unnumbered command
+  byte status = ackBusy;
   // if the message is 'K'
-  if(command == 'K' && length == 1) { // if the message is a single "K"
-    sprintf(response, "kick in progress");
+  if(command == 'K') {
     if(kickPinStatus == kickOff) { // check if a kick is in progress
-      sprintf(response, "performing kick at %d until %d", currentTime, currentTime + kickPulseTime);
       kickPinStatus = kickOn;
       kickPreviousTime = currentTime;
+      status = ackDone;
     }
-    Serial.println(response);
-  }
-
-  // if the message is 'D[0-9]*'
-  if(command == 'D' && length == 1) { // if the message starts with a "D"
-    sprintf(response, "Dribble in progress");
+  // if the message is 'D'
+  } else if(command == 'D') {
     if (dribblePinStatus == dribbleOff) {
       dribblePinStatus = dribbleOn;
     }
-  }
-
-  if(command == 'S' && length == 1) {
-    sprintf(response, "Dribble halted");
+    dribblePreviousTime = currentTime; // the host only repeats "D" every second, keep dribbling until dribblePulseTime after the last one
+    status = ackDone;
+  // if the message is 'S'
+  } else if(command == 'S') {
     if (dribblePinStatus == dribbleOn) {
       dribblePinStatus = dribbleOff;
     }
+    status = ackDone;
+  } else { // not a command, nothing to acknowledge
+    return;
+  }
+  sendAck(command, id, status, currentTime);
+}
+
+void sendAck(char command, uint16_t id, byte status, uint32_t currentTime) {
+  /*
+  * sendAck(char, uint16_t, byte, uint32_t)
+  *    sends an ack frame: command (uint8), id (uint16), status (uint8), currentTime (uint32), little endian
+  */
+  byte payload[8] = {
+    (byte)command,
+    (byte)(id), (byte)(id >> 8),
+    status,
+    (byte)(currentTime), (byte)(currentTime >> 8), (byte)(currentTime >> 16), (byte)(currentTime >> 24)
+  };
+  sendFrame(frameAck, payload, sizeof(payload));
+}
+
+void sendFrame(byte type, byte * payload, byte length) {
+  /*
+  * sendFrame(byte, byte *, byte)
+  *    writes a binary frame to the host
+  * args:
+  *   type: frame type
+  *   payload: frame payload
+  *   length: number of bytes in payload
+  */
+  byte checksum = type ^ length;
+  Serial.write(frameSync);
+  Serial.write(type);
+  Serial.write(length);
+  for(byte i = 0; i < length; i++) {
+    Serial.write(payload[i]);
+    checksum ^= payload[i];
   }
-  sprintf(response, "action finished");
-  Serial.println(response);
+  Serial.write(checksum);
+}
+
+void sendBallState(byte type, bool present, uint32_t currentTime) {
+  /*
+  * sendBallState(byte, bool, uint32_t)
+  *    sends an IR or heartbeat frame: ball present (uint8), currentTime (uint32, little endian)
+  */
+  byte payload[5] = {
+    present,
+    (byte)(currentTime), (byte)(currentTime >> 8), (byte)(currentTime >> 16), (byte)(currentTime >> 24)
+  };
+  sendFrame(type, payload, sizeof(payload));
 }
 
 bool checkPinStatusBool(bool pinStatus, uint32_t currentTime, uint32_t previousTime, uint32_t pulseTime) {
@@ -0,0 +1,130 @@
+'''
+benchmark suite, run from the repository root:
+
+    python -m benchmarks --json bench.json
+    python -m benchmarks --compare bench.json
+'''
+import argparse
+import importlib
+import json
+import os
+import platform
+import re
+import sys
+import time
+import logging
+
+log = logging.getLogger()
+
+BENCHMARKS = ('codec', 'ipc', 'kinematics', 'pipeline', 'arduino', 'runtime', 'jitter', 'tracelog', 'replay')
+
+# direction of every metric the benchmarks report, the first matching pattern wins.
+# -1: lower is better, +1: higher is better, 0: describes the run and is not compared
+METRICS: tuple[tuple[str, int], ...] = (
+    (r'us_per_op|.*_us', -1), # latencies and costs
+    (r'pss_mb|cpu_percent(_.*)?|context_switches_per_s', -1), # resources
+    (r'overruns|overflows|missed|lost|dropped|expiries|reordered|duplicates', -1), # failures
+    (r'ops_per_s|(acked|cycles|delivered|replayed|sent)_per_s|accepted', 1), # throughput
+    (r'processes|datagrams|received|coalesced|dispatched|voltage', 0),
+)
+
+def direction(metric: str) -> int | None:
+    '''
+        direction() - whether `metric` is better lower (-1) or higher (1), 0 if it is not compared
+
+        @returns
+            int | None - None for a metric missing from `METRICS`
+    '''
+    for pattern, sign in METRICS:
+        if re.fullmatch(pattern, metric):
+            return sign
+    return None
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    '''
+        compare() - finds metrics that got worse than `baseline` by more than `tolerance`, in the direction
+            given by `METRICS`. a failure count that was 0 in `baseline` is a regression as soon as it is not
+
+        @returns
+            list[str] - one line per regression
+    '''
+    regressions = []
+    unknown = set()
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            sign = direction(metric)
+            if sign is None:
+                unknown.add(metric)
+                continue
+            old = baseline.get(name, {}).get(metric)
+            if not sign or old is None:
+                continue
+            if old == 0:
+                if sign < 0 and value > 0:
+                    regressions.append(f'{name}.{metric}: 0 -> {value:.3f}')
+                continue
+            change = (value - old) / abs(old)
+            if change * -sign > tolerance:
+                regressions.append(f'{name}.{metric}: {old:.3f} -> {value:.3f} ({change:+.1%})')
+    for metric in sorted(unknown):
+        log.warning(f'{metric} is not compared, add it to benchmarks.__main__.METRICS')
+    return regressions
+
+def add_arguments(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    parser.add_argument('--only', type=str, default=','.join(BENCHMARKS), help='comma separated benchmarks to run')
+    parser.add_argument('--json', type=str, default=None, help='write the results to this file')
+    parser.add_argument('--compare', type=str, default=None, help='baseline results to compare against')
+    parser.add_argument('--tolerance', type=float, default=.1, help='relative change counted as a regression')
+    group = parser.add_argument_group('pipeline')
+    group.add_argument('--duration', type=float, default=2.)
+    group.add_argument('--rate', type=float, default=500., help='actions sent per second')
+    group.add_argument('--port', type=int, default=50614)
+    group.add_argument('--receiver', choices=('async', 'dummy'), default='async')
+    group.add_argument('--sim-latency', type=float, default=.001, help='seconds per simulated CAN cycle')
+    group.add_argument('--control-rate', type=float, default=100., help='motor control loop rate (Hz)')
+    group = parser.add_argument_group('arduino')
+    group.add_argument('--arduino-rate', type=float, default=200., help='dribbler commands per second')
+    group.add_argument('--arduino-latency', type=float, default=.001, help='seconds before the fake arduino replies')
+    group = parser.add_argument_group('jitter')
+    group.add_argument('--jitter-load', type=int, default=os.cpu_count(), help='busy processes competing with the motor loop')
+    group.add_argument('--jitter-cpu', type=int, default=None, help='cpu the motor loop is pinned to, the last available cpu by default')
+    group.add_argument('--jitter-priority', type=int, default=50, help='SCHED_FIFO priority of the pinned motor loop, 0 leaves it off')
+    group = parser.add_argument_group('replay')
+    group.add_argument('--replay', type=str, default=None, metavar='PATH', help='command log recorded with run.py --record, a synthetic stream at --rate by default')
+    group.add_argument('--replay-speed', type=float, default=0., help='1 keeps the recorded timing, 0 replays as fast as possible')
+    return parser
+
+if __name__ == '__main__':
+    logging.basicConfig(format="%(levelname)s - %(message)s", level=logging.INFO)
+    args = add_arguments(argparse.ArgumentParser(prog='python -m benchmarks')).parse_args()
+
+    results = dict()
+    for name in args.only.split(','):
+        try:
+            module = importlib.import_module(f'benchmarks.{name}')
+            results.update(module.run(args))
+        except ImportError as e:
+            log.warning(f'{name}: skipped ({e})')
+
+    report = {
+        'meta': {
+            'time': time.time(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            f.write(output)
+    print(output)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            log.error(f'regression: {line}')
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,51 @@
+'''ArduinoController against the pseudo-terminal fake arduino'''
+from Client import SharedMemoryResource
+from Client.Controllers.Arduino import ArduinoController
+from Client.Controllers.FakeArduino import FakeArduino
+from Client.Shared.Action import Action
+import threading
+import time
+
+def run(args) -> dict:
+    resource = SharedMemoryResource()
+    arduino = FakeArduino(latency=args.arduino_latency).start()
+    controller = ArduinoController(resource, arduino.port, 115200, timeout=.1)
+    controller.gc_force_shutdown_event = shutdown = threading.Event()
+    controller.start_reader()
+    runner = threading.Thread(target=controller.run, name='arduino controller')
+    try:
+        # toggle the dribbler with every command so each one is a transition that gets written
+        action = Action(robot_id=1)
+        resource.set_action(action)
+        runner.start()
+        period = 1. / args.arduino_rate
+        cpu = time.process_time()
+        start = next_command = time.monotonic()
+        while next_command - start < args.duration:
+            action = Action(robot_id=1, dribble=int(not action.dribble), seq=action.seq + 1)
+            action.recv_ns = time.monotonic_ns()
+            resource.set_action(action)
+            next_command += period
+            delay = next_command - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        elapsed = time.monotonic() - start
+        cpu = time.process_time() - cpu # controller, its reader thread, the fake arduino thread and this loop
+        time.sleep(controller.ACK_TIMEOUT + controller.POLL_INTERVAL)
+        shutdown.set()
+        runner.join()
+        stats = controller.stats()
+    finally:
+        shutdown.set()
+        controller._exit()
+        arduino.stop()
+        resource.close()
+        resource.unlink()
+
+    return {'arduino': {
+        'cpu_percent': cpu / elapsed * 100.,
+        'acked_per_s': stats['acked'] / elapsed,
+        'lost': stats['lost'],
+        'overflows': stats['overflows'],
+        **{k: v for k, v in stats.items() if k.startswith('rtt_D_') or k.startswith('rtt_S_')},
+    }}
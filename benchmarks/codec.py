@@ -0,0 +1,30 @@
+'''Action encode / decode throughput'''
+from Client.Shared.Action import Action, ActionBatch, decode_datagram
+from Client.Shared.Trajectory import Trajectory
+from Client.Shared.Telemetry import Telemetry, decode_frames
+import numpy as np
+from benchmarks.common import measure
+
+def run(args) -> dict:
+    action = Action(robot_id=3, vx=123.456, vy=-78.9, w=1.2345, kick=1, dribble=1, seq=42)
+    text = action.encode()
+    binary = action.encode(binary=True)
+    batch = ActionBatch([Action(robot_id=i, vx=float(i), seq=42) for i in range(1, 17)]).encode()
+    t = np.linspace(0., .2, 16)
+    trajectory = Trajectory(robot_id=3, waypoints=np.column_stack((t, 100. * np.sin(t), 100. * np.cos(t), t)), seq=42)
+    trajectory_binary = trajectory.encode()
+    frames = [Telemetry(robot_id=i, seq=42, voltage=24., wheel_velocity=(1., 2., 3., 4.)).encode() for i in range(1, 17)]
+
+    return {
+        'encode_text': measure(action.encode),
+        'encode_binary': measure(lambda: action.encode(binary=True)),
+        'decode_text': measure(lambda: Action.decode(text)),
+        'decode_binary': measure(lambda: Action.decode(binary)),
+        'encode_batch_16': measure(ActionBatch([Action(robot_id=i, seq=42) for i in range(1, 17)]).encode),
+        'extract_batch_16': measure(lambda: decode_datagram(batch, 16)),
+        'encode_trajectory_16': measure(trajectory.encode),
+        'decode_trajectory_16': measure(lambda: decode_datagram(trajectory_binary, 3)),
+        'sample_trajectory': measure(lambda: trajectory.sample(.123)),
+        'decode_telemetry': measure(lambda: Telemetry.decode(frames[0])),
+        'decode_telemetry_frames_16': measure(lambda: decode_frames(frames)),
+    }
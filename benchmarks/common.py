@@ -0,0 +1,32 @@
+'''timing helpers shared by the benchmarks'''
+import time
+
+def measure(fn, repeat: int=5, min_time: float=.2) -> dict:
+    '''
+        measure() - times `fn` in batches large enough to take `min_time` seconds, keeps the best batch
+
+        @args
+            fn (Callable[[], object]): function to benchmark, called without arguments
+            repeat (int): number of timed batches
+            min_time (float): minimum duration of a batch in seconds
+
+        @returns
+            dict - `us_per_op` and `ops_per_s` of the best batch
+    '''
+    number = 1
+    while True:
+        elapsed = _time(fn, number)
+        if elapsed >= min_time * 1e9 / 10:
+            break
+        number *= 10
+    number = max(1, int(number * min_time * 1e9 / elapsed))
+
+    best = min(_time(fn, number) for _ in range(repeat)) / number
+    return {'us_per_op': best / 1e3, 'ops_per_s': 1e9 / best}
+
+def _time(fn, number: int) -> int:
+    start = time.perf_counter_ns()
+    for _ in range(number):
+        fn()
+    return max(time.perf_counter_ns() - start, 1)
+
@@ -0,0 +1,39 @@
+'''shared global resource round trip cost: BaseManager proxy vs. shared memory mailboxes'''
+from Client import SharedResource, SharedResourceProxy, SharedMemoryResource
+from Client.Shared.Action import Action
+from multiprocessing.managers import BaseManager
+from benchmarks.common import measure
+
+shared_global_resource = SharedResource()
+
+def get_shared_global_resource():
+    return shared_global_resource
+
+def run(args) -> dict:
+    action = Action(robot_id=1, vx=100., vy=0., w=0., kick=0, dribble=0, seq=1)
+    results = dict()
+
+    # the layout run.py used before the shared memory mailboxes
+    BaseManager.register("SharedResource", None, SharedResourceProxy)
+    BaseManager.register("get_shared_global_resource", get_shared_global_resource)
+    manager = BaseManager()
+    manager.start()
+    try:
+        proxy = manager.get_shared_global_resource()
+        proxy._callmethod('set_action', (action,))
+        results['proxy_get_action'] = measure(proxy.get_action)
+        results['proxy_set_action'] = measure(lambda: proxy._callmethod('set_action', (action,)))
+    finally:
+        manager.shutdown()
+
+    resource = SharedMemoryResource()
+    try:
+        resource.set_action(action)
+        results['shm_get_action'] = measure(resource.get_action)
+        results['shm_set_action'] = measure(lambda: resource.set_action(action))
+        # every get after a set has to decode the new action
+        results['shm_set_get_action'] = measure(lambda: (resource.set_action(action), resource.get_action()))
+    finally:
+        resource.close()
+        resource.unlink()
+    return results
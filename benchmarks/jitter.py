@@ -0,0 +1,64 @@
+'''motor loop jitter under cpu load, without and with --cpu-affinity / --motor-fifo-priority'''
+from Client import SharedResource
+from Client.Controllers.Motor2 import MotorController2
+from Client.Controllers.Simulated import SimulatedTransport
+from Client.Controllers.Watchdog import CommandWatchdog
+from Client.Placement import ProcessPlacement
+from Client.Shared.Action import Action
+from multiprocessing import Process, Queue, Event
+import asyncio
+import logging
+import os
+import time
+
+log = logging.getLogger()
+
+def _spin(placement: ProcessPlacement, stop) -> None:
+    placement.apply('dispatcher') # stands in for the processes the motor loop competes with
+    while not stop.is_set():
+        pass
+
+def _motor(args, placement: ProcessPlacement, results: Queue) -> None:
+    problems = placement.apply('motor')
+    resource = SharedResource()
+    action = Action(robot_id=1, vx=100., vy=0., w=0.)
+    action.recv_ns = time.monotonic_ns()
+    resource.set_action(action)
+    motor = MotorController2(resource, SimulatedTransport(MotorController2.SERVO_BUS_MAP, latency=args.sim_latency), args.control_rate)
+    motor.watchdog = CommandWatchdog(ttl=1e6) # keep driving the one action
+    try:
+        asyncio.run(asyncio.wait_for(motor.run(), args.duration))
+    except asyncio.TimeoutError:
+        pass
+    results.put((problems, motor.scheduler.stats()))
+
+def _measure(args, placement: ProcessPlacement) -> dict:
+    stop = Event()
+    results = Queue()
+    load = [Process(target=_spin, args=(placement, stop), daemon=True) for _ in range(args.jitter_load)]
+    for process in load:
+        process.start()
+    try:
+        motor = Process(target=_motor, args=(args, placement, results), daemon=True)
+        motor.start()
+        problems, stats = results.get(timeout=args.duration + 10.)
+        motor.join()
+    finally:
+        stop.set()
+        for process in load:
+            process.join()
+    for problem in problems:
+        log.warning(f'jitter: {problem}')
+    return {k: v for k, v in stats.items() if k.startswith('jitter_') or k in ('overruns', 'missed')}
+
+def run(args) -> dict:
+    cpus = sorted(os.sched_getaffinity(0))
+    motor_cpu = args.jitter_cpu if args.jitter_cpu is not None else cpus[-1]
+    others = set(cpus) - {motor_cpu} or {motor_cpu} # with a single cpu, only SCHED_FIFO can help
+    placed = ProcessPlacement({'motor': {motor_cpu}, 'dispatcher': others}, {'motor': args.jitter_priority} if args.jitter_priority else None)
+    for problem in placed.check():
+        log.warning(f'jitter: not applied: {problem}')
+    return {
+        'jitter_default': _measure(args, ProcessPlacement()),
+        'jitter_placed': _measure(args, placed),
+    }
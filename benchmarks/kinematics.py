@@ -0,0 +1,10 @@
+'''MotorController.calculate() cost per call'''
+from Client.Controllers.Motor import MotorController
+from Client.Controllers.Simulated import SimulatedTransport
+from benchmarks.common import measure
+
+def run(args) -> dict:
+    motor = MotorController(None, transport=SimulatedTransport(MotorController.SERVO_BUS_MAP, latency=0.))
+    return {
+        'calculate': measure(lambda: motor.calculate(.5, 100., -50.)),
+    }
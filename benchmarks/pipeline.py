@@ -0,0 +1,136 @@
+'''loopback pipeline: dummy.py sender -> receiver -> dispatcher -> controllers'''
+from Client import SharedMemoryResource
+from Client.Controllers.BaseController import BaseController
+from Client.Dispatcher import Dispatcher
+from Client.Receivers.Async import AsyncReciever
+from Client.Receivers.Dummy import DummyReciever
+from Client.Shared.Action import Action
+from Client.Tracer import LatencyHistogram, tracer
+from Client.Controllers.Motor2 import MotorController2
+from Client.Controllers.Simulated import SimulatedTransport
+from dummy import DummyUDPSender
+from multiprocessing import Process, Queue, Event
+import asyncio
+import time
+
+RECEIVERS = {'async': AsyncReciever, 'dummy': DummyReciever}
+
+class LatencyController(BaseController):
+    def __init__(self, shared_global_resource) -> None:
+        """
+            controller which records how long each new action took to reach it
+        attributes:
+            delivered (int): distinct actions seen
+            e2e (LatencyHistogram): sender timestamp to controller (wall clock, same host)
+            handoff (LatencyHistogram): receiver to controller (monotonic clock)
+        """
+        super().__init__(shared_global_resource)
+        self.delivered: int = 0
+        self.e2e = LatencyHistogram()
+        self.handoff = LatencyHistogram()
+        self._seq = None
+
+    def do(self, action: Action) -> None:
+        if action.seq == self._seq:
+            return
+        self._seq = action.seq
+        self.delivered += 1
+        self.e2e.record(int((time.time() - action._time) * 1e9))
+        self.handoff.record(time.monotonic_ns() - action.recv_ns)
+
+def _latency_consumer(shared_global_resource, shutdown, results: Queue) -> None:
+    controller = LatencyController(shared_global_resource)
+    controller.gc_force_shutdown_event = shutdown
+    controller.run()
+    results.put(('latency', {
+        'delivered': controller.delivered,
+        **{f'e2e_{k}': v for k, v in controller.e2e.summary().items() if k != 'count'},
+        **{f'handoff_{k}': v for k, v in controller.handoff.summary().items() if k != 'count'},
+    }))
+
+def _motor_consumer(shared_global_resource, args, results: Queue) -> None:
+    tracer.enable()
+    motor = MotorController2(shared_global_resource, SimulatedTransport(MotorController2.SERVO_BUS_MAP, latency=args.sim_latency), args.control_rate)
+    try:
+        asyncio.run(asyncio.wait_for(motor.run(), args.duration))
+    except asyncio.TimeoutError:
+        pass
+    report = tracer.report()
+    results.put(('motor', {
+        'cycles_per_s': motor.transport.cycles / args.duration,
+        'expiries': motor.watchdog.expiries,
+        'voltage': shared_global_resource.get_voltage(),
+        **{k: v for k, v in motor.scheduler.stats().items() if k.startswith('jitter_') or k == 'overruns'},
+        **{f'{stage}_{k}': v for stage in ('motor_do', 'can_cycle') for k, v in report.get(stage, {}).items() if k != 'count'},
+    }))
+
+def run(args) -> dict:
+    resource = SharedMemoryResource()
+    queue = Queue()
+    dispatcher = Dispatcher()
+    results = Queue()
+    shutdown = Event()
+
+    receiver = RECEIVERS[args.receiver](port=args.port, robot_id=1)
+    services = [
+        Process(target=receiver, args=(queue,), daemon=True),
+        Process(target=dispatcher, args=(queue, resource, []), daemon=True),
+    ]
+    for process in services:
+        process.start()
+
+    sender = DummyUDPSender('127.0.0.1', args.port, binary=True)
+    sender.connect()
+    seq = 0
+    def send() -> None:
+        nonlocal seq
+        seq += 1
+        sender.socket.sendto(Action(robot_id=1, vx=100., vy=0., w=0., kick=0, dribble=0, seq=seq).encode(binary=True), (sender.ip_addr, sender.port))
+
+    try:
+        # prime the pipeline so the controllers start with a valid action
+        deadline = time.monotonic() + 5.
+        while resource.get_action() is None:
+            if time.monotonic() > deadline:
+                raise RuntimeError('no action made it through the pipeline')
+            send()
+            time.sleep(.01)
+
+        consumers = [
+            Process(target=_latency_consumer, args=(resource, shutdown, results), daemon=True),
+            Process(target=_motor_consumer, args=(resource, args, results), daemon=True),
+        ]
+        for process in consumers:
+            process.start()
+
+        sent = 0
+        period = 1. / args.rate
+        start = next_send = time.monotonic()
+        while next_send - start < args.duration:
+            send()
+            sent += 1
+            next_send += period
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        elapsed = time.monotonic() - start
+
+        time.sleep(.1) # let the last actions drain
+        shutdown.set()
+        collected = dict(results.get(timeout=args.duration + 10.) for _ in consumers)
+        for process in consumers:
+            process.join()
+    finally:
+        for process in services:
+            process.terminate()
+        resource.close()
+        resource.unlink()
+
+    output = {f'pipeline_{args.receiver}': {
+        'sent_per_s': sent / elapsed,
+        'delivered_per_s': collected['latency']['delivered'] / elapsed,
+        **dispatcher.stats(),
+        **{k: v for k, v in collected['latency'].items() if k != 'delivered'},
+    }}
+    output[f'pipeline_{args.receiver}_motor'] = collected['motor']
+    return output
@@ -0,0 +1,86 @@
+'''recorded command stream (run.py --record, or a synthetic one) replayed into the receiver -> motor loop path'''
+from Client.Controllers.Motor2 import MotorController2Factory
+from Client.Receivers.Async import AsyncReciever
+from Client.Receivers.Recorder import DatagramRecorder
+from Client.Runtime import SingleProcessRuntime
+from Client.Shared.Action import Action
+from Client.Tracer import tracer
+from benchmarks.runtime import _controller_args, _until
+from multiprocessing import Process, Queue, Event
+from replay import DatagramReplayer
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+def _synthesize(path: str, args) -> float:
+    '''
+        _synthesize() - records `--duration` seconds of binary actions for robot 1 sent at `--rate`, with gaussian jitter
+
+        @returns
+            float - microseconds per `DatagramRecorder.append()`
+    '''
+    rng = random.Random(0)
+    period_ns = 1e9 / args.rate
+    count = int(args.duration * args.rate)
+    datagrams = [Action(robot_id=1, vx=100. * rng.random(), vy=0., w=0., kick=0, dribble=0, seq=seq).encode(binary=True) for seq in range(1, count + 1)]
+    recorder = DatagramRecorder(path, 64 * count + 4096)
+    recv_ns = 0
+    start = time.perf_counter_ns()
+    for data in datagrams:
+        recv_ns += max(0, int(rng.gauss(period_ns, period_ns / 10)))
+        recorder.append(data, ('127.0.0.1', 50000), recv_ns)
+    elapsed = time.perf_counter_ns() - start
+    recorder.close()
+    return elapsed / count / 1e3
+
+def _consumer(args, ready, shutdown, results: Queue) -> None:
+    tracer.enable()
+    receiver = AsyncReciever(port=args.port, robot_id=1)
+    receiver.connect()
+    runtime = SingleProcessRuntime(receiver)
+    runtime.motor = MotorController2Factory.make(runtime.shared_global_resource, _controller_args(args))
+    ready.set()
+    asyncio.run(_until(shutdown, runtime.run()))
+    report = tracer.report()
+    results.put({
+        'received': runtime.received,
+        **{k: getattr(receiver.sequence_filter, k) for k in ('accepted', 'lost', 'reordered', 'duplicates')},
+        **{f'motor_do_{k}': v for k, v in report.get('motor_do', {}).items() if k != 'count'},
+    })
+
+def run(args) -> dict:
+    ready, shutdown = Event(), Event()
+    results = Queue()
+    with tempfile.TemporaryDirectory() as directory:
+        output = dict()
+        path = args.replay
+        if path is None:
+            path = os.path.join(directory, 'commands.log')
+            output['record_append_us'] = _synthesize(path, args)
+
+        consumer = Process(target=_consumer, args=(args, ready, shutdown, results), daemon=True)
+        consumer.start()
+        replayer = DatagramReplayer(path, port=args.port, speed=args.replay_speed)
+        replayer.connect()
+        try:
+            if not ready.wait(10.):
+                raise RuntimeError('the receiver did not start')
+            time.sleep(.5) # let the event loop bind the socket
+            elapsed = replayer.replay()
+            time.sleep(.1) # let the last actions drain
+            shutdown.set()
+            collected = results.get(timeout=10.)
+            consumer.join()
+        finally:
+            replayer.close()
+            consumer.terminate()
+
+    output.update({
+        'datagrams': replayer.sent,
+        'replayed_per_s': replayer.sent / max(elapsed, 1e-9),
+        'late_max_us': replayer.late_ns / 1e3,
+        **collected,
+    })
+    return {f'replay_{"max" if args.replay_speed <= 0 else f"{args.replay_speed:g}x"}': output}
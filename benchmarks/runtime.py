@@ -0,0 +1,160 @@
+'''
+multi-process layout of run.py against --single-process: latency, memory, context switches and cpu.
+the cpu use is also reported per process. the multi-process arduino controller polls the shared
+memory mailbox every ArduinoController.WAKE_INTERVAL, the single-process one waits on an asyncio event
+'''
+from Client import SharedMemoryResource
+from Client.Controllers.BaseController import BaseController
+from Client.Controllers.Motor2 import MotorController, MotorController2Factory
+from Client.Controllers.Arduino import ArduinoController, ArduinoControllerFactory
+from Client.Dispatcher import Dispatcher
+from Client.Receivers.Async import AsyncReciever
+from Client.Runtime import SingleProcessRuntime
+from Client.Shared.Action import Action
+from Client.Tracer import tracer
+from multiprocessing import Process, Queue, Event
+import argparse
+import asyncio
+import os
+import socket
+import time
+
+# tracepoints reported for both layouts, measured from the UDP receipt of the command
+STAGES = ('motor_do', 'serial_write')
+
+def _controller_args(args) -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser = BaseController.add_cls_specific_arguments(parser)
+    parser = MotorController.add_cls_specific_arguments(parser)
+    parser = ArduinoController.add_cls_specific_arguments(parser)
+    return parser.parse_args([
+        '--motor-transport', 'simulated',
+        '--sim-latency', str(args.sim_latency),
+        '--control-rate', str(args.control_rate),
+        '--fake-arduino',
+        '--fake-arduino-latency', str(args.arduino_latency),
+    ])
+
+async def _until(shutdown, coroutine) -> None:
+    task = asyncio.create_task(coroutine)
+    while not shutdown.is_set() and not task.done():
+        await asyncio.sleep(.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+def _report(name: str) -> tuple[str, dict]:
+    report = tracer.report()
+    return name, {f'{stage}_{k}': v for stage in STAGES if stage in report for k, v in report[stage].items() if k != 'count'}
+
+def _single(args, shutdown, results: Queue) -> None:
+    tracer.enable()
+    receiver = AsyncReciever(port=args.port, robot_id=1)
+    receiver.connect()
+    runtime = SingleProcessRuntime(receiver)
+    controller_args = _controller_args(args)
+    runtime.motor = MotorController2Factory.make(runtime.shared_global_resource, controller_args)
+    runtime.arduino = ArduinoControllerFactory.make(runtime.shared_global_resource, controller_args)
+    asyncio.run(_until(shutdown, runtime.run()))
+    results.put(_report('single'))
+
+def _motor(resource, args, shutdown, results: Queue) -> None:
+    tracer.enable()
+    motor = MotorController2Factory.make(resource, _controller_args(args))
+    asyncio.run(_until(shutdown, motor.run()))
+    results.put(_report('motor'))
+
+def _arduino(resource, args, shutdown, results: Queue) -> None:
+    tracer.enable()
+    arduino = ArduinoControllerFactory.make(resource, _controller_args(args))
+    arduino.gc_force_shutdown_event = shutdown
+    arduino.start_reader()
+    arduino.run()
+    arduino._exit()
+    results.put(_report('arduino'))
+
+def _sample(pids: dict[str, int]) -> dict:
+    '''
+        _sample() - cpu time (s) and context switches of every thread of `pids`, and their proportional set size (MB).
+            the cpu time is also given per process name
+    '''
+    ticks = os.sysconf('SC_CLK_TCK')
+    cpu = switches = pss = 0
+    per_process = dict()
+    for name, pid in pids.items():
+        per_process[name] = 0
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            per_process[name] += (int(fields[11]) + int(fields[12])) / ticks # utime, stime
+            with open(f'/proc/{pid}/task/{task}/status') as f:
+                switches += sum(int(line.split()[1]) for line in f if 'ctxt_switches' in line)
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            pss += sum(int(line.split()[1]) for line in f if line.startswith('Pss:')) / 1024
+        cpu += per_process[name]
+    return {'cpu': cpu, 'switches': switches, 'pss': pss, 'per_process': per_process}
+
+def _measure(args, layout: str) -> dict:
+    shutdown = Event()
+    results = Queue()
+    if layout == 'single':
+        services, consumers = [], [Process(target=_single, args=(args, shutdown, results), name='single', daemon=True)]
+        resource = None
+    else:
+        resource = SharedMemoryResource()
+        queue = Queue()
+        services = [
+            Process(target=AsyncReciever(port=args.port, robot_id=1), args=(queue,), name='receiver', daemon=True),
+            Process(target=Dispatcher(), args=(queue, resource, []), name='dispatcher', daemon=True),
+        ]
+        consumers = [
+            Process(target=_motor, args=(resource, args, shutdown, results), name='motor', daemon=True),
+            Process(target=_arduino, args=(resource, args, shutdown, results), name='arduino', daemon=True),
+        ]
+    processes = services + consumers
+    for process in processes:
+        process.start()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        time.sleep(1.) # let every process get to its loop
+        pids = {process.name: process.pid for process in processes}
+        before = _sample(pids)
+        # alternate the dribbler with every command, so each one reaches the serial port as well as the wheels
+        sent = 0
+        period = 1. / args.rate
+        start = next_send = time.monotonic()
+        while next_send - start < args.duration:
+            sent += 1
+            sock.sendto(Action(robot_id=1, vx=100., vy=0., w=0., kick=0, dribble=sent & 1, seq=sent).encode(binary=True), ('127.0.0.1', args.port))
+            next_send += period
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        elapsed = time.monotonic() - start
+        after = _sample(pids)
+
+        shutdown.set()
+        collected = dict(results.get(timeout=10.) for _ in consumers)
+        for process in consumers:
+            process.join()
+    finally:
+        sock.close()
+        for process in processes:
+            process.terminate()
+        if resource is not None:
+            resource.close()
+            resource.unlink()
+
+    output = {
+        'processes': len(processes),
+        'pss_mb': after['pss'],
+        'cpu_percent': (after['cpu'] - before['cpu']) / elapsed * 100.,
+        'context_switches_per_s': (after['switches'] - before['switches']) / elapsed,
+        **{f'cpu_percent_{name}': (cpu - before['per_process'][name]) / elapsed * 100. for name, cpu in after['per_process'].items()},
+    }
+    for metrics in collected.values():
+        output.update(metrics)
+    return output
+
+def run(args) -> dict:
+    return {f'runtime_{layout}': _measure(args, layout) for layout in ('multi', 'single')}
@@ -0,0 +1,48 @@
+'''cost of a hot path trace record against a formatted log.debug() call'''
+from Client import SharedResource
+from Client.Controllers.Motor2 import MotorController2
+from Client.Controllers.Simulated import SimulatedTransport
+from Client.Shared.Action import Action
+from Client.TraceLog import TraceLog
+from Client.TraceLog import tracelog as shared_tracelog
+from benchmarks.common import measure
+import logging
+import os
+import tempfile
+
+def run(args) -> dict:
+    trace = TraceLog()
+    event = trace.event('twist', 'seq={0} vx={1:.1f} vy={2:.1f} w={3:.3f}')
+    vx, vy, vw = 100., -50., .5
+
+    # what the hot path used to do: format an f-string and emit it through a handler at DEBUG
+    logger = logging.getLogger('benchmarks.tracelog')
+    logger.propagate = False
+    devnull = open(os.devnull, 'w')
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter('%(asctime)s: (%(filename)s:%(lineno)d) %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+
+    motor = MotorController2(SharedResource(), SimulatedTransport(MotorController2.SERVO_BUS_MAP, latency=0.))
+    action = Action(robot_id=1, vx=vx, vy=vy, w=vw, seq=1)
+
+    results = {
+        'record_off': measure(lambda: trace.record(event, 1, vx, vy, vw)),
+        'log_debug': measure(lambda: logger.debug(f"{vx=}, {vy=}, {vw=}")),
+        'motor_do_trace_off': measure(lambda: motor.do(action)),
+    }
+    with tempfile.TemporaryDirectory() as directory: # binary sink, as with run.py --trace-log PATH
+        trace.enable(os.path.join(directory, 'bench'))
+        results['record_on'] = measure(lambda: trace.record(event, 1, vx, vy, vw))
+        trace.enabled = False
+        trace.close()
+
+        shared_tracelog.enable(os.path.join(directory, 'trace'))
+        results['motor_do_trace_on'] = measure(lambda: motor.do(action))
+        shared_tracelog.enabled = False
+        shared_tracelog.close()
+
+    logger.removeHandler(handler)
+    devnull.close()
+    return {f'tracelog_{name}': metrics for name, metrics in results.items()}
@@ -2,18 +2,23 @@
 
 import socket
 import time
-from Client.Shared.Action import Action
+import math
+from Client.Shared.Action import Action, ActionBatch
+from Client.Shared.Trajectory import Trajectory
 import argparse
 import logging
 
 log = logging.getLogger()
-log.setLevel(logging.NOTSET)
     
 class DummyUDPSender:
     ''' send a constant stream of action objects to (ip_addr, port)'''
-    def __init__(self, ip_addr: str='127.0.0.1', port: int=50514) -> None:
+    def __init__(self, ip_addr: str='127.0.0.1', port: int=50514, binary: bool=False, batch: int=0, broadcast: bool=False, trajectory: int=0) -> None:
         self.ip_addr = ip_addr
         self.port = port 
+        self.binary = binary # send the fixed-width binary format instead of text
+        self.batch = batch # send one batch datagram for robots 1..batch instead of a single action
+        self.broadcast = broadcast # `ip_addr` is a broadcast address
+        self.trajectory = trajectory # send trajectories of this many waypoints instead of actions
         self.socket = None
 
     def connect(self) -> None:
@@ -21,6 +26,8 @@ class DummyUDPSender:
             connect() - creates an UDP socket for `socket`
         '''
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if self.broadcast:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
 
     def send(self) -> None:
         '''
@@ -29,13 +36,23 @@ class DummyUDPSender:
         # check if the attribute `socket` is a socket
         if self.socket is None: 
             raise UserWarning('connect() needs to be called before send_msg()')
-        # import math
+        seq = 0
         while True:
+            seq = seq % 0xFFFFFFFF + 1 # 1..2**32-1, 0 means not numbered
             # vx = math.sin(time.time()) * 100
             # vy = math.cos(time.time()) * 100
             vx = 100
             vy = 0
-            msg = Action(robot_id=1, vx=vx, vy=vy, w=0., kick=0, dribble=0).encode()
+            if self.trajectory:
+                # the next second of a circle, re-sent every 0.2 seconds
+                t = [i / (self.trajectory - 1) if self.trajectory > 1 else 0. for i in range(self.trajectory)]
+                start = time.time()
+                waypoints = [(dt, 100 * math.cos(start + dt), 100 * math.sin(start + dt), 0.) for dt in t]
+                msg = Trajectory(robot_id=1, waypoints=waypoints, seq=seq).encode()
+            elif self.batch:
+                msg = ActionBatch([Action(robot_id=i, vx=vx, vy=vy, w=0., kick=0, dribble=0, seq=seq) for i in range(1, self.batch + 1)]).encode()
+            else:
+                msg = Action(robot_id=1, vx=vx, vy=vy, w=0., kick=0, dribble=0, seq=seq).encode(self.binary)
             print(f'Sending Action... {msg}')
             self.socket.sendto(msg, (self.ip_addr, self.port))
             time.sleep(0.2) # sleep until the controller has executed the action
@@ -46,6 +63,10 @@ class DummyUDPSender:
             add_cls_specific_arguments() - adds the following arguments:
                 --ip : destination of `Action` packets
                 --port : listening port at destination
+                --binary : send `Action` packets in the binary format
+                --batch : send a single batch packet for robots 1..N
+                --broadcast : allow --ip to be a broadcast address
+                --trajectory : send trajectories with N waypoints over the next second instead of actions
 
             @args
                 parent (argparse.ArgumentParser) - argparse (from run.py)
@@ -56,6 +77,10 @@ class DummyUDPSender:
         parser = parent.add_argument_group('sender')
         parser.add_argument('--ip', type=str, default='127.0.0.1')
         parent.add_argument('--port', type=int, default=50514)
+        parser.add_argument('--binary', action='store_true')
+        parser.add_argument('--batch', type=int, default=0)
+        parser.add_argument('--broadcast', action='store_true')
+        parser.add_argument('--trajectory', type=int, default=0)
         return parent
 
 
@@ -65,6 +90,6 @@ if __name__ == '__main__':
     args = parser.parse_args()
     kwargs = vars(args)
 
-    sender = DummyUDPSender(kwargs['ip'], kwargs['port'])
+    sender = DummyUDPSender(kwargs['ip'], kwargs['port'], kwargs['binary'], kwargs['batch'], kwargs['broadcast'], kwargs['trajectory'])
     sender.connect()
     sender.send()
\ No newline at end of file
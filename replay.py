@@ -0,0 +1,112 @@
+#! /usr/bin/env python3 -B
+
+import socket
+import time
+from Client.Receivers.Recorder import DatagramRecorder
+import argparse
+import logging
+
+log = logging.getLogger()
+
+class DatagramReplayer:
+    ''' re-send the datagrams of a run.py --record log to (ip_addr, port), with their recorded timing'''
+    def __init__(self, path: str, ip_addr: str='127.0.0.1', port: int=50514, speed: float=1., broadcast: bool=False) -> None:
+        self.path = path
+        self.ip_addr = ip_addr
+        self.port = port
+        self.speed = speed # 1 keeps the recorded timing, 2 replays twice as fast, 0 sends as fast as possible
+        self.broadcast = broadcast # `ip_addr` is a broadcast address
+        self.sockets: dict = dict() # one socket per recorded sender, so the sequence filter keeps their streams apart
+        self.records: list = list(DatagramRecorder.read(path))
+        self.sent: int = 0
+        self.late_ns: int = 0 # largest delay behind the recorded timing
+
+    def connect(self) -> None:
+        '''
+            connect() - creates an UDP socket for every sender in the log
+        '''
+        for _, addr, _ in self.records:
+            if addr not in self.sockets:
+                sock = self.sockets[addr] = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                if self.broadcast:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+    def replay(self, duration: float=None) -> float:
+        '''
+            replay() - sends every datagram of the log once, `speed` times faster than it was recorded
+
+            @args
+                duration (float): stop after this many seconds, None replays the whole log
+
+            @returns
+                float - seconds the replay took
+        '''
+        if not self.sockets:
+            raise UserWarning('connect() needs to be called before replay()')
+        if not self.records:
+            return 0.
+        first_ns = self.records[0][0]
+        start_ns = time.monotonic_ns()
+        end_ns = start_ns + int(duration * 1e9) if duration is not None else None
+        destination = (self.ip_addr, self.port)
+        for recv_ns, addr, data in self.records:
+            now_ns = time.monotonic_ns()
+            if self.speed > 0:
+                due_ns = start_ns + int((recv_ns - first_ns) / self.speed)
+                if due_ns > now_ns:
+                    time.sleep((due_ns - now_ns) / 1e9)
+                    now_ns = time.monotonic_ns()
+                self.late_ns = max(self.late_ns, now_ns - due_ns)
+            if end_ns is not None and now_ns > end_ns:
+                break
+            self.sockets[addr].sendto(data, destination)
+            self.sent += 1
+        return (time.monotonic_ns() - start_ns) / 1e9
+
+    def close(self) -> None:
+        for sock in self.sockets.values():
+            sock.close()
+        self.sockets.clear()
+
+    @staticmethod
+    def add_cls_specific_arguments(parent: argparse.ArgumentParser) -> argparse.ArgumentParser:
+        '''
+            add_cls_specific_arguments() - adds the following arguments:
+                log : file written by run.py --record
+                --ip : destination of the datagrams
+                --port : listening port at destination
+                --speed : replay speed, 1 keeps the recorded timing, 0 sends as fast as possible
+                --broadcast : allow --ip to be a broadcast address
+                --loop : replay the log this many times, 0 forever
+
+            @args
+                parent (argparse.ArgumentParser) - argparse
+
+            @returns
+                parent (argparse.ArgumentParser)
+        '''
+        parser = parent.add_argument_group('replay')
+        parser.add_argument('log', type=str)
+        parser.add_argument('--ip', type=str, default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=50514)
+        parser.add_argument('--speed', type=float, default=1.)
+        parser.add_argument('--broadcast', action='store_true')
+        parser.add_argument('--loop', type=int, default=1)
+        return parent
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format="%(levelname)s - %(message)s", level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser = DatagramReplayer.add_cls_specific_arguments(parser)
+    args = parser.parse_args()
+
+    run = 0
+    while args.loop == 0 or run < args.loop:
+        run += 1
+        # new sockets for every pass, the receiver takes the repeated sequence numbers for new senders
+        replayer = DatagramReplayer(args.log, args.ip, args.port, args.speed, args.broadcast)
+        replayer.connect()
+        elapsed = replayer.replay()
+        replayer.close()
+        log.info(f'pass {run}: {replayer.sent} datagrams in {elapsed:.3f}s ({replayer.sent / max(elapsed, 1e-9):.0f}/s), at most {replayer.late_ns / 1e6:.3f}ms late')
@@ -1,19 +1,24 @@
 #! /usr/bin/python3
-from multiprocessing import Process, freeze_support, Manager, Queue
-
-from Client.Receivers.Dummy import DummyReciever
-from Client.Shared.Action import Action
-from Client.Controllers.Motor2 import MotorController, MotorController2Factory
-from Client.Controllers.Arduino import ArduinoController, ArduinoControllerFactory
-from Client import SharedResource, SharedResourceProxy
-
-from Client.Shared.RobotUDP import *
+from multiprocessing import Process, freeze_support, Queue
+
+# controllers and receivers are imported from their registries once they are enabled
+from Client.Controllers import controllers
+from Client.Receivers import receivers
+from Client.Controllers.BaseController import BaseController
+from Client import SharedMemoryResource
+from Client.Dispatcher import Dispatcher
+from Client.Publisher import TelemetryPublisher
+from Client.Runtime import SingleProcessRuntime
+from Client.Placement import ProcessPlacement, ROLES
+from Client.Registry import profile_startup
+from Client.Tracer import tracer
+from Client.TraceLog import TraceLog, tracelog
 import multiprocessing 
-from multiprocessing.managers import BaseManager
 
 import argparse
-from functools import reduce
-import operator
+import asyncio
+import os
+import sys
 import logging
 
 class CustomFormatter(logging.Formatter):
@@ -34,73 +39,99 @@ class CustomFormatter(logging.Formatter):
         logging.CRITICAL: bold_red + format + reset
     }
 
+    FORMATTERS = {level: logging.Formatter(fmt) for level, fmt in FORMATS.items()}
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt)
-        return formatter.format(record)
+        return self.FORMATTERS[record.levelno].format(record)
     
 ch = logging.StreamHandler()
-ch.setLevel(logging.DEBUG)
 ch.setFormatter(CustomFormatter())
 log = logging.getLogger()
-log.setLevel(logging.DEBUG)
+log.setLevel(logging.INFO) # until --log-level is parsed
 log.addHandler(ch)
 
-import logging
-logging.basicConfig(format = "%(asctime)s: (%(filename)s:%(lineno)d) %(levelname)s - %(message)s")
-log = logging.getLogger()
-log.setLevel(logging.DEBUG)
-
-shared_global_resource = SharedResource()
-
-# global shared reource
-def get_shared_global_resource():
-    return shared_global_resource
-
-def magic(q: multiprocessing.Queue, shared_global_resource, events: multiprocessing.Event) -> None:
-    while True:
-        if not q.empty():
-            # set the shared namespace variable `action`
-            # to the recved action
-            action = q.get()
-            if reduce(operator.or_, (x.is_set() for x in events)):
-                continue 
-
-            if not isinstance(action, Action):
-                raise TypeError(f'action is not type: {Action}, got {type(action)}')
-            shared_global_resource.set_action(action)
-            # set all events and wait...
-            # timeout after 1 second if subprocesses freezes
-            # for event in events:
-            #     event.set()
-
-            # log.info(f'voltage: {shared_global_resource.get_voltage()}')
-            # log.info(f'current: {shared_global_resource.get_current()}')
-
 if __name__ == '__main__':
 
     freeze_support()
 
     # add arguments to run.py
-    parser = argparse.ArgumentParser()
-    parser = MotorController.add_cls_specific_arguments(parser)
-    parser = ArduinoController.add_cls_specific_arguments(parser)
+    parser = argparse.ArgumentParser(add_help=False) # --help is added once every argument is known
+    parser.add_argument('--receiver', choices=receivers.names(), default='async')
+    parser.add_argument('--trace', action='store_true', help='record per-stage command latency, dumped on SIGUSR1')
+    parser.add_argument('--log-level', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'), default='INFO')
+    parser.add_argument('--list-controllers', action='store_true', help='import every controller and receiver, print their import times and exit')
+    parser.add_argument('--profile-startup', action='store_true', help='print the slowest imports of this command line (python -X importtime) and exit')
+    parser = BaseController.add_cls_specific_arguments(parser)
+    group = parser.add_argument_group('controllers')
+    for controller in controllers:
+        group.add_argument(f'--disable-{controller.name}-controller', action='store_true', help=controller.description)
+    parser = TelemetryPublisher.add_cls_specific_arguments(parser)
+    parser = SingleProcessRuntime.add_cls_specific_arguments(parser)
+    parser = ProcessPlacement.add_cls_specific_arguments(parser)
+    parser = TraceLog.add_cls_specific_arguments(parser)
+
+    # only the selected receiver and the enabled controllers are imported, for their arguments
+    known, _ = parser.parse_known_args()
+    if known.profile_startup:
+        argv = [arg for arg in sys.argv if arg != '--profile-startup']
+        modules = profile_startup(argv, env={**os.environ, 'CLIENT_IMPORT_ONLY': '1'})
+        print(f'{"module":<48} {"self [ms]":>10} {"cumulative [ms]":>16}')
+        for name, own, cumulative in modules:
+            print(f'{name:<48} {own / 1e3:>10.1f} {cumulative / 1e3:>16.1f}')
+        sys.exit(0)
+    parser = receivers[known.receiver].cls.add_cls_specific_arguments(parser)
+    for controller in controllers:
+        if known.list_controllers or not getattr(known, f'disable_{controller.name}_controller'):
+            parser = controller.cls.add_cls_specific_arguments(parser)
+    parser.add_argument('-h', '--help', action='help', help='show this help message and exit')
     args = parser.parse_args()
+    log.setLevel(args.log_level)
     log.debug(f'{args=}')
 
+    if args.list_controllers:
+        for kind, registry in (('controller', controllers), ('receiver', receivers)):
+            for plugin in registry: # timed in a new interpreter, this one already imported some of them
+                print(f'{kind:<10} {plugin.name:<8} {plugin.fresh_import_time() * 1e3:>7.1f}ms  {plugin.module:<28} {plugin.description}')
+        sys.exit(0)
+    if os.environ.get('CLIENT_IMPORT_ONLY'): # --profile-startup: stop once everything this command line needs is imported
+        receivers[args.receiver].load()
+        sys.exit(0)
+    if args.single_process and args.receiver != 'async':
+        parser.error('--single-process needs --receiver async')
+
+    if args.trace:
+        tracer.enable()
+    tracer.install() # kill -USR1 -<pgid> dumps the latency histograms of every process
+    if args.trace_log is not None:
+        tracelog.enable(args.trace_log or None, capacity=args.trace_capacity) # forked processes start their own writer
+
+    # cpu affinity and SCHED_FIFO, each process applies its own settings when it starts
+    placement = ProcessPlacement.from_args(args)
+    # with --single-process every task runs in one process, placed like the motor loop
+    for problem in placement.check(('motor',) if args.single_process else ROLES):
+        log.warning(f'not applied: {problem}')
+
+    if args.single_process:
+        # receiver, controllers and telemetry as tasks of this process' event loop, placed like the motor loop
+        for problem in placement.apply('motor'):
+            log.warning(problem)
+        log.info(f'single process: {placement.describe()}')
+        try:
+            asyncio.run(SingleProcessRuntime.from_args(args).run())
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+
     # shared queue for inter-process communication
     q = Queue()
     # primary UDP communications to TC
-    primary = Process(target=DummyReciever(), args=(q,))
+    receiver = receivers[args.receiver].cls
+    primary = Process(target=placement.wrap('receiver', receiver(robot_id=args.robot_id, multicast_group=args.multicast_group, record=args.record, record_size=args.record_size)), args=(q,))
     log.info(f"starting {primary=}")
     primary.start() 
     
-    # shared inter-process manager
-    BaseManager.register("SharedResource", None, SharedResourceProxy)
-    BaseManager.register("get_shared_global_resource", get_shared_global_resource)
-    m = BaseManager()
-    m.start()
-    f = m.get_shared_global_resource()
+    # shared memory mailboxes for inter-process communication
+    f = SharedMemoryResource()
     # events for inter-process mmessaging
     controller_specific_events = dict()
     controller_specific_events['gc_force_shutdown_event'] = multiprocessing.Event()
@@ -114,7 +145,7 @@ if __name__ == '__main__':
         controller_specific_events['tc_action_recv_event'] = multiprocessing.Event() 
         events.append(controller_specific_events['tc_action_recv_event'])
         # initalise motor controller
-        motor = Process(target=MotorController2Factory(), args=(f, controller_specific_events ,args), name="Motor Controller")
+        motor = Process(target=placement.wrap('motor', controllers['motor'].factory()), args=(f, controller_specific_events ,args), name="Motor Controller")
         processes.append(motor)
 
     # check if the argument --disable-arduino-controller is set, if set -> disable arduino
@@ -123,22 +154,34 @@ if __name__ == '__main__':
         controller_specific_events['tc_action_recv_event'] = multiprocessing.Event()
         events.append(controller_specific_events['tc_action_recv_event'])
         # initalise arduino controller
-        ardunio = Process(target=ArduinoControllerFactory(), args=(f, controller_specific_events, args), name="Ardunio Controller")
+        ardunio = Process(target=placement.wrap('arduino', controllers['arduino'].factory()), args=(f, controller_specific_events, args), name="Ardunio Controller")
         processes.append(ardunio)
 
     # shared mutliprocessing.Queue for UDP listerner to communicate with distribution()
-    secondary = Process(target=magic, args=(q, f, events,), name="Magic", daemon=True)
+    magic = Dispatcher()
+    secondary = Process(target=placement.wrap('dispatcher', magic), args=(q, f, events,), name="Magic", daemon=True)
     log.info(f"starting {secondary=}")
     secondary.start()
 
+    # status uplink to the team controller
+    if args.telemetry_host is not None:
+        telemetry = Process(target=placement.wrap('telemetry', TelemetryPublisher(args.telemetry_host, args.telemetry_port, args.telemetry_rate, args.robot_id)), args=(f,), name="Telemetry", daemon=True)
+        log.info(f"starting {telemetry=}")
+        telemetry.start()
+
     # start all controllers
     for process in processes:
         log.info(f"starting {process=}")
         process.start()
 
     # wait for sub-processes to end
-    secondary.join()
-    primary.join()
-
-    for process in processes:
-        process.join()
+    try:
+        secondary.join()
+        primary.join()
+
+        for process in processes:
+            process.join()
+    finally:
+        log.info(f'dispatcher: {magic.stats()}')
+        f.close()
+        f.unlink()
@@ -1,31 +1,92 @@
 '''controller for arduino (to control kicker and dribbler)'''
 from Client.Controllers.BaseController import BaseController
+from Client.Controllers.Watchdog import CommandWatchdog
+from Client.Controllers.ArduinoProtocol import FrameParser, FRAME_IR, FRAME_HEARTBEAT, FRAME_ACK, IR_STRUCT, ACK_STRUCT, ACK_BUSY, COMMAND_ID_MODULO, encode_command
 from Client.Shared.Action import Action
+from Client.Tracer import LatencyHistogram, tracer
 
 import serial
 from serial.tools import list_ports
 import argparse
+import asyncio
+import threading
+import time
 import logging
 
 log = logging.getLogger()
-log.setLevel(logging.NOTSET)
 
 class ArduinoController(BaseController):
+    # bytes held back when the serial link falls behind, commands that do not fit wait for the next pass
+    MAX_PENDING: int = 64
+    # bytes allowed in the OS output queue before writing more, so a write never has to wait
+    MAX_IN_FLIGHT: int = 32
+    # seconds after which the dribble state is sent again, the firmware stops the dribbler after 20s without one
+    REFRESH_INTERVAL: float = 1.
+    # seconds to wait for the acknowledgement of a command before counting it as lost
+    ACK_TIMEOUT: float = .25
+    # seconds between two checks of the shared global resource for a new action in run()
+    WAKE_INTERVAL: float = .001
+    # seconds between two passes without a new action, to refresh the dribbler, retry writes and expire commands
+    POLL_INTERVAL: float = .01
+
     def __init__(self, shared_global_resource, port: str=None, baudrate: int=None, timeout: int=1) -> None:
         """
-            ardunio controller
+            ardunio controller. only changes of the kicker and dribbler state are written, through a bounded
+            buffer on a non-blocking port
         attributes:
             port (int): serial COM port
             baudrate (int): baud rate of COM
             timeout (int): time to wait before controller assumes serial.Serial has failed
             serial: (serial.Serial): COM port object
+            commands_sent (int): commands written to the serial port
+            commands_saved (int): commands of new actions that repeated the state already sent, and were not written
+            bytes_sent (int): bytes written to the serial port
+            bytes_saved (int): bytes of the repeated commands that were not written
+            overflows (int): commands deferred because the output buffer was full
+            parser (FrameParser): parses the frames the firmware sends back
+            ball (bool): the IR sensor sees the ball, None until the firmware reported it
+            rtt (dict[str, LatencyHistogram]): command to acknowledgement round trip per command letter
+            kick_latency (LatencyHistogram): UDP receipt of a kick command to its acknowledgement
+            acked (int): commands acknowledged
+            busy (int): commands the firmware acknowledged without carrying them out
+            lost (int): commands without an acknowledgement after ACK_TIMEOUT
+            unexpected_acks (int): acknowledgements of commands that were not in flight
         """
         super().__init__(shared_global_resource)
 
         self._port: str = port
         self._baudrate: int = baudrate
         self._timeout: int = timeout
-        self.serial: serial.Serial = serial.Serial(self._port, self._baudrate, timeout=self._timeout) # open up a serial port to communicate with the ardunio
+        self.serial: serial.Serial = serial.Serial(self._port, self._baudrate, timeout=self._timeout, write_timeout=0) # open up a serial port to communicate with the ardunio
+
+        self._pending = bytearray() # commands waiting for room in the OS output queue
+        self._kick: bool = False # kick flag of the last command, a kick is sent on its rising edge
+        self._dribble: bool = None # dribble state last sent, None before the first command
+        self._refresh_at: float = 0.
+        self._action_key: tuple = None # (recv_ns, seq) of the action of the last pass
+        self.commands_sent: int = 0
+        self.commands_saved: int = 0
+        self.bytes_sent: int = 0
+        self.bytes_saved: int = 0
+        self.overflows: int = 0
+
+        self.parser = FrameParser()
+        self.ball: bool = None
+        self._ball_changed_ns: int = 0
+        self._reader: threading.Thread = None
+
+        self._command_id: int = 0
+        self._in_flight: dict[int, tuple[bytes, int, int]] = dict() # id: (command, sent_ns, recv_ns), oldest first
+        self._in_flight_lock = threading.Lock() # acknowledgements are handled on the reader thread
+        self.rtt: dict[str, LatencyHistogram] = {command: LatencyHistogram() for command in 'KDS'}
+        self.kick_latency = LatencyHistogram()
+        self.acked: int = 0
+        self.busy: int = 0
+        self.lost: int = 0
+        self.unexpected_acks: int = 0
+        for command, histogram in self.rtt.items():
+            tracer.attach(f'arduino_rtt_{command}', histogram)
+        tracer.attach('kick_latency', self.kick_latency)
 
         log.debug(self)
 
@@ -34,17 +95,214 @@ class ArduinoController(BaseController):
             do() - implements BaseController do(). refer to BaseController do()
 
         '''
-        # check if action.kick is set...
-        if action.kick:
-            log.info('Kicking...')
-            self.serial.write(b'K\n')
-        # check if action.dribble is 1 or True, start dribble if so
-        if action.dribble == 1:
-            log.info('Dribbling...')
-            self.serial.write(b'D\n')
-         # check if action.dribble is 0 or False, stop dribble if so
-        elif action.dribble == 0:
-            self.serial.write(b'S\n')
+        # a pass without a new action only refreshes, retries and expires: nothing is counted as saved
+        key = (action.recv_ns, action.seq)
+        new = key != self._action_key
+        self._action_key = key
+        # kick once when action.kick is set, not on every pass while it stays set
+        kick = bool(action.kick)
+        if kick and not self._kick:
+            if self.send(b'K', action):
+                log.info('Kicking...')
+                self._kick = kick
+        else:
+            if kick and new:
+                self._saved(b'K')
+            self._kick = kick
+        # start (D) or stop (S) the dribbler when action.dribble changes
+        dribble = action.dribble == 1
+        command = b'D' if dribble else b'S'
+        now = time.monotonic()
+        if dribble != self._dribble or now >= self._refresh_at:
+            if self.send(command, action):
+                self._dribble = dribble
+                self._refresh_at = now + self.REFRESH_INTERVAL
+        elif new:
+            self._saved(command)
+        self.flush()
+        self.expire()
+
+    def run(self) -> None:
+        '''
+            run() - overloads BaseController run(): checks the shared global resource for a new action every
+                WAKE_INTERVAL and handles it straight away. without one, a pass runs every POLL_INTERVAL, like
+                serve(), instead of spinning on the mailbox
+        '''
+        last, next_pass = None, 0.
+        while not self._gc_force_shutdown_event.is_set():
+            try:
+                action = self.shared_global_resource.get_action() # the same object until a new action is published
+                now = time.monotonic()
+                if action is not last or now >= next_pass:
+                    last, next_pass = action, now + self.POLL_INTERVAL
+                    self.do(self.next_action())
+                time.sleep(self.WAKE_INTERVAL)
+            except KeyboardInterrupt:
+                self._exit()
+                return
+
+    def send(self, command: bytes, action: Action) -> bool:
+        '''
+            send() - numbers `command` and queues it for the serial port
+
+            @args
+                command (bytes): command letter, b'K', b'D' or b'S'
+                action (Action): action the command was made for
+
+            @returns
+                bool - False if the output buffer is full, the caller tries again on its next pass
+        '''
+        id = self._command_id % (COMMAND_ID_MODULO - 1) + 1 # 1..65535, the firmware acknowledges 0 for unnumbered commands
+        message = encode_command(command, id)
+        if len(self._pending) + len(message) > self.MAX_PENDING:
+            self.overflows += 1
+            return False
+        self._command_id = id
+        self._pending += message
+        self.commands_sent += 1
+        with self._in_flight_lock:
+            self._in_flight[id] = (command, time.monotonic_ns(), action.recv_ns)
+        tracer.mark('serial_write', action.recv_ns)
+        return True
+
+    def expire(self) -> None:
+        '''
+            expire() - counts the commands whose acknowledgement is overdue as lost
+        '''
+        deadline = time.monotonic_ns() - int(self.ACK_TIMEOUT * 1e9)
+        with self._in_flight_lock:
+            while self._in_flight:
+                id = next(iter(self._in_flight))
+                command, sent_ns, _ = self._in_flight[id]
+                if sent_ns > deadline:
+                    break
+                del self._in_flight[id]
+                self.lost += 1
+                log.warning(f'arduino did not acknowledge {command.decode()}{id} ({self.lost} lost)')
+
+    def handle_ack(self, payload: bytes, now: int) -> None:
+        '''
+            handle_ack() - records the round trip of the command acknowledged by `payload`, received at `now` (ns)
+        '''
+        command, id, status, _ = ACK_STRUCT.unpack(payload)
+        with self._in_flight_lock:
+            entry = self._in_flight.pop(id, None)
+        if entry is None:
+            self.unexpected_acks += 1
+            return
+        _, sent_ns, recv_ns = entry
+        self.acked += 1
+        if status == ACK_BUSY:
+            self.busy += 1
+        letter = chr(command)
+        if letter in self.rtt:
+            self.rtt[letter].record(now - sent_ns)
+        if letter == 'K' and recv_ns:
+            self.kick_latency.record(now - recv_ns)
+
+    def flush(self) -> None:
+        '''
+            flush() - writes as much of the output buffer as the OS output queue takes without waiting
+        '''
+        if not self._pending or self.serial.out_waiting > self.MAX_IN_FLIGHT:
+            return
+        n = self.serial.write(self._pending) # write_timeout=0: returns the number of bytes written
+        if n:
+            del self._pending[:n]
+            self.bytes_sent += n
+
+    def start_reader(self) -> None:
+        '''
+            start_reader() - parses the firmware's frames on a background thread, publishing the ball sensor
+                state to the shared global resource as it changes
+        '''
+        self._reader = threading.Thread(target=self._read_frames, name='arduino reader', daemon=True)
+        self._reader.start()
+
+    def _read_frames(self) -> None:
+        while not self.is_closed:
+            try:
+                data = self.serial.read(self.serial.in_waiting or 1) # wakes up on the first byte, or after `timeout`
+            except (serial.SerialException, TypeError, OSError): # closed while waiting
+                break
+            self.handle_data(data, time.monotonic_ns())
+
+    def handle_data(self, data: bytes, now: int) -> None:
+        '''
+            handle_data() - parses `data` read from the serial port at `now` (ns) and handles every complete frame
+        '''
+        for frame_type, payload in self.parser.feed(data):
+            if frame_type == FRAME_ACK:
+                self.handle_ack(payload, now)
+            elif frame_type in (FRAME_IR, FRAME_HEARTBEAT):
+                present, _ = IR_STRUCT.unpack(payload)
+                self.handle_ball(bool(present), now)
+
+    async def serve(self, action_event: asyncio.Event, poll_interval: float=.01) -> None:
+        '''
+            serve() - event loop version of run() and start_reader(): handles each action as soon as `action_event`
+                is set, and at least every `poll_interval` seconds to retry deferred writes and expire commands.
+                the firmware's frames are read by a reader callback on the serial port's file descriptor
+
+            @args
+                action_event (asyncio.Event): set by whoever publishes a new action
+                poll_interval (float): longest wait between two passes in seconds
+        '''
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self.serial.fileno(), self._read_available)
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(action_event.wait(), poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                action_event.clear()
+                self.do(self.next_action())
+        finally:
+            loop.remove_reader(self.serial.fileno())
+            self._exit()
+
+    def _read_available(self) -> None:
+        try:
+            data = self.serial.read(self.serial.in_waiting)
+        except (serial.SerialException, OSError) as e:
+            log.error(f'arduino read failed, no longer reading: {e}')
+            asyncio.get_running_loop().remove_reader(self.serial.fileno())
+            return
+        if data:
+            self.handle_data(data, time.monotonic_ns())
+
+    def handle_ball(self, present: bool, now: int) -> None:
+        '''
+            handle_ball() - records the ball sensor state of an IR event or heartbeat received at `now` (ns)
+        '''
+        if present != self.ball: # a heartbeat also catches an edge whose frame was lost
+            self.ball = present
+            self._ball_changed_ns = now
+            log.debug(f'ball {"present" if present else "lost"}')
+        self.shared_global_resource.set_ball(present, self._ball_changed_ns, now)
+
+    def stats(self) -> dict:
+        '''
+            stats() - serial traffic counters
+        '''
+        return {
+            'commands_sent': self.commands_sent,
+            'commands_saved': self.commands_saved,
+            'bytes_sent': self.bytes_sent,
+            'bytes_saved': self.bytes_saved,
+            'overflows': self.overflows,
+            'acked': self.acked,
+            'busy': self.busy,
+            'lost': self.lost,
+            'unexpected_acks': self.unexpected_acks,
+            **{f'rtt_{command}_{k}': v for command, histogram in self.rtt.items() for k, v in histogram.summary().items() if k != 'count'},
+            **self.parser.stats(),
+        }
+
+    def _saved(self, command: bytes) -> None:
+        self.commands_saved += 1
+        self.bytes_saved += len(encode_command(command, self._command_id))
 
     def read(self) -> str:
         ''''
@@ -113,14 +371,20 @@ class ArduinoController(BaseController):
     @staticmethod
     def add_cls_specific_arguments(parent: argparse.ArgumentParser) -> None:
         parser = parent.add_argument_group('ArdunioController')
-        parser.add_argument('--disable-arduino-controller', action='store_true')
+        parser.add_argument('--arduino-port', type=str, default=None, help='serial port of the arduino, detected by USB vendor id if not given')
+        parser.add_argument('--fake-arduino', action='store_true', help='run against a pseudo-terminal fake arduino')
         parent.add_argument('--baud-rate', type=int, default=115200)
+        # options of Client.Controllers.FakeArduino, which is only imported with --fake-arduino
+        parser.add_argument('--fake-arduino-latency', type=float, default=0., help='seconds before the fake arduino replies')
+        parser.add_argument('--fake-arduino-drop-rate', type=float, default=0., help='probability of a lost byte on the fake serial link')
+        parser.add_argument('--fake-arduino-ir-period', type=float, default=None, help='seconds between ball sensor changes')
         return parent
 
     def _exit(self):
         '''
         _exit() - implements BaseController _exit()
         '''
+        log.info(f'arduino: {self.stats()}')
         if not self.is_closed:
             self.serial.close()
     
@@ -144,7 +408,7 @@ class ArduinoController(BaseController):
     
 class ArduinoControllerFactory():
     @staticmethod
-    def __call__(namespace, event, *args) -> None:
+    def __call__(namespace, event, args) -> None:
         '''
         __call__() constructs an ardunio controller object to listen for action objects
 
@@ -152,14 +416,34 @@ class ArduinoControllerFactory():
             namespace : mulitprocessing shared namespace for inter-process communications
             event (mutliprocessing.Event): mulitprocessing shared event for inter-process messaging
         '''
-        baudrate = getattr(args, 'baud_rate')
-        port = ArduinoController.detect_ardunio_device()
-        log.debug(f'detected ardunio on {port}')
-        ardunio = ArduinoController(namespace, port, baudrate)
+        ardunio = ArduinoControllerFactory.make(namespace, args)
         ardunio.tc_action_recv_event = event['tc_action_recv_event']
         ardunio.gc_force_shutdown_event = event['gc_force_shutdown_event']
+        ardunio.start_reader()
         ardunio.run()
 
+    @staticmethod
+    def make(shared_global_resource, args) -> ArduinoController:
+        '''
+        make() - opens the arduino (or fake arduino) port selected by `args`
+
+        @returns
+            ArduinoController - controller configured from `args`, not yet reading or running
+        '''
+        baudrate = getattr(args, 'baud_rate')
+        if args.fake_arduino:
+            from Client.Controllers.FakeArduino import FakeArduino
+            port = FakeArduino(args.fake_arduino_latency, args.fake_arduino_drop_rate, args.fake_arduino_ir_period).start().port
+            log.info(f'fake ardunio on {port}')
+        elif args.arduino_port is not None:
+            port = args.arduino_port
+        else:
+            port = ArduinoController.detect_ardunio_device()
+            log.debug(f'detected ardunio on {port}')
+        ardunio = ArduinoController(shared_global_resource, port, baudrate)
+        ardunio.watchdog = CommandWatchdog(args.command_ttl)
+        return ardunio
+
 if __name__ == '__main__':
     port = ArduinoController.detect_ardunio_device()
     arduino = ArduinoController(port, 115200)
@@ -0,0 +1,110 @@
+'''binary frames sent by the arduino firmware (Arduino/Robot/Robot.ino)'''
+import struct
+import logging
+
+log = logging.getLogger()
+
+# frame: sync (uint8), type (uint8), length (uint8), `length` bytes of payload,
+#   checksum (uint8): xor of type, length and every payload byte
+FRAME_SYNC: int = 0xAA
+FRAME_HEADER: struct.Struct = struct.Struct('<BBB')
+MAX_PAYLOAD: int = 32
+
+# frame types
+FRAME_IR: int = 0x01 # the IR ball sensor changed state
+FRAME_HEARTBEAT: int = 0x02 # sent periodically with the current IR state
+FRAME_ACK: int = 0x03 # answers a numbered command
+
+# payload of FRAME_IR and FRAME_HEARTBEAT: ball present (uint8), firmware millis() (uint32)
+IR_STRUCT: struct.Struct = struct.Struct('<BI')
+
+# payload of FRAME_ACK: command (uint8, e.g. ord('K')), id (uint16), status (uint8), firmware millis() (uint32)
+ACK_STRUCT: struct.Struct = struct.Struct('<BHBI')
+ACK_DONE: int = 1 # the command was carried out
+ACK_BUSY: int = 0 # the command was ignored, e.g. a kick while the kicker is still firing
+
+# commands are sent as text: the command letter, its id in decimal and a newline, e.g. b'K42\n'
+COMMAND_ID_MODULO: int = 1 << 16
+
+def encode_command(command: bytes, id: int) -> bytes:
+    '''
+        encode_command() - numbered command for the firmware, e.g. encode_command(b'K', 42) == b'K42\n'
+    '''
+    return b'%s%d\n' % (command, id)
+
+def encode_frame(frame_type: int, payload: bytes) -> bytes:
+    '''
+        encode_frame() - frames `payload` the way the firmware does
+
+        @args
+            frame_type (int): one of the FRAME_* types
+            payload (bytes): at most MAX_PAYLOAD bytes
+
+        @returns
+            bytes - sync, header, payload and checksum
+    '''
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f'payload of {len(payload)} bytes exceeds {MAX_PAYLOAD} bytes')
+    checksum = frame_type ^ len(payload)
+    for byte in payload:
+        checksum ^= byte
+    return FRAME_HEADER.pack(FRAME_SYNC, frame_type, len(payload)) + payload + bytes((checksum,))
+
+class FrameParser:
+    def __init__(self) -> None:
+        """
+            incremental parser of the firmware's byte stream. bytes that do not belong to a valid frame
+            (text output, line noise, a frame cut off by a reset) are skipped until the next sync byte
+        attributes:
+            frames (int): valid frames parsed
+            checksum_errors (int): frames dropped because of a wrong checksum
+            skipped (int): bytes discarded while looking for a sync byte
+        """
+        self._buffer = bytearray()
+        self.frames: int = 0
+        self.checksum_errors: int = 0
+        self.skipped: int = 0
+
+    def feed(self, data: bytes) -> list[tuple[int, bytes]]:
+        '''
+            feed() - adds `data` to the stream
+
+            @returns
+                list[tuple[int, bytes]] - (type, payload) of every frame completed by `data`
+        '''
+        buffer = self._buffer
+        buffer += data
+        frames = []
+        while True:
+            start = buffer.find(FRAME_SYNC)
+            if start < 0:
+                self.skipped += len(buffer)
+                buffer.clear()
+                break
+            if start:
+                self.skipped += start
+                del buffer[:start]
+            if len(buffer) < FRAME_HEADER.size:
+                break
+            _, frame_type, length = FRAME_HEADER.unpack_from(buffer)
+            if length > MAX_PAYLOAD: # not a frame, look for the next sync byte
+                self.skipped += 1
+                del buffer[:1]
+                continue
+            end = FRAME_HEADER.size + length
+            if len(buffer) <= end:
+                break
+            checksum = frame_type ^ length
+            for byte in buffer[FRAME_HEADER.size:end]:
+                checksum ^= byte
+            if checksum != buffer[end]:
+                self.checksum_errors += 1
+                del buffer[:1]
+                continue
+            frames.append((frame_type, bytes(buffer[FRAME_HEADER.size:end])))
+            self.frames += 1
+            del buffer[:end + 1]
+        return frames
+
+    def stats(self) -> dict:
+        return {'frames': self.frames, 'checksum_errors': self.checksum_errors, 'skipped': self.skipped}
@@ -1,11 +1,11 @@
 '''abstract controller class'''
 from Client.Shared.Action import Action
+from Client.Controllers.Watchdog import CommandWatchdog
 from multiprocessing import Event
 import argparse
 import logging
 
 log = logging.getLogger()
-log.setLevel(logging.NOTSET)
 
 class BaseController:
     def __init__(self, shared_global_resource) -> None:
@@ -14,9 +14,12 @@ class BaseController:
         Params:
             event_acton_is_set (mutliprocessing.Event): event to tell process an action has been received
             recv: (multiprocessing.Pipe): deprecated
+            watchdog (CommandWatchdog): replaces expired commands with a stop
         """
         self._msg_recv_event = None
         self.shared_global_resource = shared_global_resource
+        self.watchdog = CommandWatchdog()
+        self._invalid_action: bool = False # an invalid action is only logged when it first appears
     
     def do(self, action: Action) -> None:
         """
@@ -26,14 +29,25 @@ class BaseController:
         """
         raise NotImplementedError()
     
+    def next_action(self) -> Action:
+        """
+            latest action of the shared global resource, a stop when there is none or it expired
+        """
+        action = self.shared_global_resource.get_action()
+        if not isinstance(action, Action):
+            if not self._invalid_action:
+                log.critical(f"unexpected type: expected 'Action', got: {action.__class__}")
+                self._invalid_action = True
+            return Action(robot_id=0)
+        self._invalid_action = False
+        if not self.watchdog.fresh(action): # stop if the team controller went quiet
+            return Action(robot_id=0)
+        return action
+
     def run(self) -> None:
         while True:
             try:
-                action = self.shared_global_resource.get_action()
-                if not isinstance(action, Action):
-                    log.critical(f"unexpected type: expected 'Action', got: {action.__class__}")
-                    action = Action(robot_id=0)
-                self.do(action)
+                self.do(self.next_action())
                 # self._msg_recv_event.clear()
             except KeyboardInterrupt:
                 self._exit()
@@ -45,6 +59,8 @@ class BaseController:
         
     @staticmethod
     def add_cls_specific_arguments(parent: argparse.ArgumentParser) -> None:
+        parser = parent.add_argument_group('BaseController')
+        parser.add_argument('--command-ttl', type=float, default=.25, help='seconds a command is applied after it was received')
         return parent
     
     def _exit(self):
@@ -6,7 +6,6 @@ import asyncio
 import logging
 
 log = logging.getLogger()
-log.setLevel(logging.NOTSET)
 
 class DummyController(BaseController): 
     def __init__(self):
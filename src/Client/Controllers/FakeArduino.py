@@ -0,0 +1,186 @@
+'''pseudo-terminal arduino running the Robot.ino protocol, for running ArduinoController without hardware'''
+from Client.Controllers.ArduinoProtocol import encode_frame, FRAME_IR, FRAME_HEARTBEAT, FRAME_ACK, IR_STRUCT, ACK_STRUCT, ACK_DONE, ACK_BUSY
+import argparse
+import heapq
+import os
+import pty
+import random
+import select
+import threading
+import time
+import tty
+import logging
+
+log = logging.getLogger()
+
+class FakeArduino:
+    # timing of Arduino/Robot/Robot.ino, in seconds
+    KICK_PULSE: float = .2
+    DRIBBLE_TIMEOUT: float = 20.
+    HEARTBEAT_INTERVAL: float = .1
+    MAX_MESSAGE_LEN: int = 256
+
+    def __init__(self, latency: float=0., drop_rate: float=0., ir_period: float=None, seed: int=None) -> None:
+        """
+            emulates the firmware in Arduino/Robot/Robot.ino behind a pseudo-terminal: numbered K/D/S commands
+            are acknowledged, the kick pulse and dribble timeout are timed like the firmware, and the IR sensor
+            reports its edges and a heartbeat. open `port` with serial.Serial like a real arduino
+        Args:
+            latency (float): seconds before the firmware's replies are written
+            drop_rate (float): probability that a byte is lost, in either direction
+            ir_period (float): the ball comes and goes every `ir_period` seconds, None leaves it to `set_ball()`
+            seed (int): seed of the random byte drops
+        attributes:
+            port (str): device path of the pseudo-terminal
+            kicks (int): kick pulses fired
+            commands (int): commands parsed
+            dropped (int): bytes dropped
+        """
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.ir_period = ir_period
+        self._random = random.Random(seed)
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port: str = os.ttyname(self._slave)
+
+        self.kicks: int = 0
+        self.commands: int = 0
+        self.dropped: int = 0
+        self.ball: bool = False
+        self.dribbling: bool = False
+        self._kick_until: float = 0.
+        self._dribble_until: float = 0.
+        self._reported_ball: bool = None
+        self._message = bytearray()
+        self._outgoing: list[tuple[float, int, bytes]] = [] # heap of (due, order, frame)
+        self._order: int = 0
+        self._running: bool = False
+        self._thread: threading.Thread = None
+
+    def start(self) -> object:
+        '''
+            start() - runs the firmware on a background thread
+
+            @returns
+                FakeArduino - self
+        '''
+        self._running = True
+        self._thread = threading.Thread(target=self.run, name='fake arduino', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        os.close(self._master)
+        os.close(self._slave)
+
+    def run(self) -> None:
+        '''
+            run() - firmware loop: reads commands, writes due replies, reports the IR sensor
+        '''
+        start = time.monotonic()
+        next_heartbeat = start
+        next_ir = start + self.ir_period if self.ir_period else None
+        while self._running:
+            now = time.monotonic()
+            if next_ir is not None and now >= next_ir:
+                self.ball = not self.ball
+                next_ir += self.ir_period
+            if self.ball != self._reported_ball: # only report changes of the IR sensor
+                self._reported_ball = self.ball
+                self._reply(FRAME_IR, IR_STRUCT.pack(self.ball, self._millis(now)), now)
+            if now >= next_heartbeat: # let the host know we are alive
+                next_heartbeat += self.HEARTBEAT_INTERVAL
+                self._reply(FRAME_HEARTBEAT, IR_STRUCT.pack(self.ball, self._millis(now)), now)
+            if self.dribbling and now >= self._dribble_until:
+                self.dribbling = False
+            self._write_due(now)
+
+            deadlines = [next_heartbeat] + ([next_ir] if next_ir is not None else []) + ([self._outgoing[0][0]] if self._outgoing else [])
+            readable, _, _ = select.select([self._master], [], [], max(min(deadlines) - time.monotonic(), 0.))
+            if readable:
+                try:
+                    data = os.read(self._master, 1024)
+                except OSError: # the pseudo-terminal was closed
+                    break
+                self._receive(self._drop(data), time.monotonic())
+
+    def set_ball(self, present: bool) -> None:
+        '''
+            set_ball() - puts the ball in front of (or takes it away from) the IR sensor
+        '''
+        self.ball = present
+
+    def _receive(self, data: bytes, now: float) -> None:
+        for byte in data:
+            if byte == ord('\n') or len(self._message) > self.MAX_MESSAGE_LEN:
+                self._parse(bytes(self._message), now)
+                self._message.clear()
+            else:
+                self._message.append(byte)
+
+    def _parse(self, message: bytes, now: float) -> None:
+        if not message:
+            return
+        command = message[:1]
+        try:
+            id = int(message[1:]) & 0xFFFF if len(message) > 1 else 0
+        except ValueError: # a byte of the id was lost
+            id = 0
+        status = ACK_BUSY
+        if command == b'K':
+            if now >= self._kick_until: # check if a kick is in progress
+                self._kick_until = now + self.KICK_PULSE
+                self.kicks += 1
+                status = ACK_DONE
+        elif command == b'D':
+            self.dribbling = True
+            self._dribble_until = now + self.DRIBBLE_TIMEOUT
+            status = ACK_DONE
+        elif command == b'S':
+            self.dribbling = False
+            status = ACK_DONE
+        else: # not a command, nothing to acknowledge
+            return
+        self.commands += 1
+        self._reply(FRAME_ACK, ACK_STRUCT.pack(command[0], id, status, self._millis(now)), now)
+
+    def _reply(self, frame_type: int, payload: bytes, now: float) -> None:
+        self._order += 1
+        heapq.heappush(self._outgoing, (now + self.latency, self._order, encode_frame(frame_type, payload)))
+
+    def _write_due(self, now: float) -> None:
+        while self._outgoing and self._outgoing[0][0] <= now:
+            _, _, frame = heapq.heappop(self._outgoing)
+            os.write(self._master, self._drop(frame))
+
+    def _drop(self, data: bytes) -> bytes:
+        if not self.drop_rate:
+            return data
+        kept = bytes(byte for byte in data if self._random.random() >= self.drop_rate)
+        self.dropped += len(data) - len(kept)
+        return kept
+
+    @staticmethod
+    def _millis(now: float) -> int:
+        return int(now * 1e3) & 0xFFFFFFFF
+
+    @property
+    def kicking(self) -> bool:
+        return time.monotonic() < self._kick_until
+
+if __name__ == '__main__':
+    logging.basicConfig(format="%(levelname)s - %(message)s", level=logging.INFO)
+    # the --fake-arduino-* options are defined once, by the controller that starts the fake with run.py --fake-arduino
+    from Client.Controllers.Arduino import ArduinoController
+    args = ArduinoController.add_cls_specific_arguments(argparse.ArgumentParser()).parse_args()
+    arduino = FakeArduino(args.fake_arduino_latency, args.fake_arduino_drop_rate, args.fake_arduino_ir_period)
+    log.info(f'fake arduino on {arduino.port}, run.py --arduino-port {arduino.port}')
+    try:
+        arduino._running = True
+        arduino.run()
+    except KeyboardInterrupt:
+        log.info(f'{arduino.commands} commands, {arduino.kicks} kicks, {arduino.dropped} bytes dropped')
@@ -1,6 +1,8 @@
 '''controller for moteus motor controllers'''
 from Client.Controllers.BaseController import BaseController
+from Client.Controllers.Watchdog import CommandWatchdog
 from Client.Shared.Action import Action
+from Client.TraceLog import tracelog
 import math
 
 import numpy as np
@@ -9,7 +11,8 @@ import time
 import logging
 
 log = logging.getLogger()
-log.setLevel(logging.NOTSET)
+
+WHEELS = tracelog.event('wheels', 'v1={1:.2f} v2={2:.2f} v3={3:.2f} v4={4:.2f}') # calculate() output
 
 try:
     import moteus
@@ -46,9 +49,21 @@ class MotorController(BaseController):
     OMNIWHEEL_3_RADIUS: float = 33.5
     OMNIWHEEL_4_RADIUS: float = 33.5
 
-    def __init__(self, shared_global_resource) -> None:
+    # maps pi3hat-fdcan bus to the moteus ids on it
+    SERVO_BUS_MAP: dict = {
+                1: [1],
+                2: [2],
+                3: [3],
+                4: [4],
+                5: [32]
+            }
+
+    def __init__(self, shared_global_resource, transport=None) -> None:
         """_summary_
             initiate the motor controller with Moteus and Moteus pi3hat
+        Args:
+            transport: object with the `moteus_pi3hat.Pi3HatRouter.cycle()` contract, None for the pi3hat.
+                a transport with a `make_controller(id)` method (`SimulatedTransport`) also provides the controllers
         Params : 
             timeout(float) : standard values for await
             u(int) : unit scaler - used for scaling, input: mm(1) to cm(10) to m (1000)
@@ -62,29 +77,32 @@ class MotorController(BaseController):
         self._interval: float = 1 # ms
         self._u: float = 1. # motor movement is in 'mm' can be scaled by changing self.u
     
-        self.servo_bus_map: dict = { 
-                    1: [1],
-                    2: [2],
-                    3: [3],
-                    4: [4],
-                    5: [32]
-                }
-
-        self.transport = moteus_pi3hat.Pi3HatRouter(
-                servo_bus_map = self.servo_bus_map
-            )
+        self.servo_bus_map: dict = self.SERVO_BUS_MAP
+
+        if transport is None:
+            transport = moteus_pi3hat.Pi3HatRouter(
+                    servo_bus_map = self.servo_bus_map
+                )
+        self.transport = transport
+
+        simulated = hasattr(self.transport, 'make_controller')
+        if simulated:
+            make_controller = self.transport.make_controller
+        else:
+            make_controller = lambda id: moteus.Controller(id=id, transport=self.transport)
         
         self.controllers: dict = { 
-                id: moteus.Controller(id=id, transport=self.transport)
+                id: make_controller(id)
                 for id in self.servo_bus_map.keys()
             }
 
-        self.diagnostics = moteus.Controller(id=32, transport=self.transport)
-        self.steam = moteus.Stream(self.diagnostics)
+        self.diagnostics = make_controller(32)
+        self.steam = None if simulated else moteus.Stream(self.diagnostics)
         
         self.set_direction_of_cw_motion() # sets wheel degrees 
         self.set_wheel_xy_location() # sets distance to centre from each wheel
         self.set_wheel_radius() # sets radius of the wheel
+        self.set_jacobian() # builds the inverse kinematics matrix from the above
         log.info("motor controller(s) initialised") #END
 
     async def do(self, action: Action): # NOT IN USE
@@ -146,28 +164,48 @@ class MotorController(BaseController):
 
         Params: 
             vb (matrix (1,3)): compiles the 3 velocity into an array
-            H (matrix(4,3)): applies the Omniwheel veloicty matrix
-            H.T: transpose H matrix into (3,4)
+            H (matrix(4,3)): the Omniwheel veloicty matrix, see set_jacobian()
 
         Returns:
             w (array): returns all calculated wheel velocity
         """
 
-        uv =  np.array([
-            (1. / self.r1) * ((self.d1 * vw) - (vx * np.sin(self.b1)) + (vy * np.cos(self.b1))),
-            (1. / self.r2) * ((self.d2 * vw) - (vx * np.sin(self.b2)) + (vy * np.cos(self.b2))),
-            (1. / self.r3) * ((self.d3 * vw) - (vx * np.sin(self.b3)) + (vy * np.cos(self.b3))),
-            (1. / self.r4) * ((self.d4 * vw) - (vx * np.sin(self.b4)) + (vy * np.cos(self.b4)))
-        ])
+        uv = self.H @ np.array((vw, vx, vy))
         
-        for v in uv:
-            if v > self.VELOCITY_UPPER_LIMIT:
-                uv = np.array([0., 0., 0., 0.])
-                break
+        if (uv > self.VELOCITY_UPPER_LIMIT).any():
+            uv = np.zeros(4)
+
+        uv *= 1/2*np.pi
+        if tracelog.enabled: # skip unpacking the array when the trace is off
+            tracelog.record(WHEELS, 0, *uv)
+        return uv
+
+    def calculate_batch(self, twists: np.ndarray) -> np.ndarray:
+        """_summary_
+            calculate() for many body twists at once, e.g. for trajectory preprocessing and simulation
+
+        Args:
+            twists (array (N,3)): rows of (w, vx, vy), in the units of calculate()
 
-        uv = np.multiply(uv, 1/2*np.pi)
-        log.debug(f"calculate({vw=}, {vx=}, {vy=}) = {uv=}")
+        Returns:
+            w (array (N,4)): wheel velocities of each twist; rows exceeding VELOCITY_UPPER_LIMIT are 0
+        """
+        uv = np.asarray(twists, dtype=float) @ self.H.T
+        uv[(uv > self.VELOCITY_UPPER_LIMIT).any(axis=1)] = 0.
+        uv *= 1/2*np.pi
         return uv
+
+    def set_jacobian(self) -> None:
+        """_summary_
+            builds the (4,3) omniwheel velocity matrix H, where row i is
+                (1 / r_i) * (d_i, -sin(b_i), cos(b_i))
+            so that the wheel velocities are H @ (w, vx, vy).
+            has to be called again after the wheel geometry or the scaling changes
+        """
+        b = np.array((self.b1, self.b2, self.b3, self.b4))
+        d = np.array((self.d1, self.d2, self.d3, self.d4))
+        r = np.array((self.r1, self.r2, self.r3, self.r4))
+        self.H = np.column_stack((d, -np.sin(b), np.cos(b))) / r[:, np.newaxis]
         
     def set_direction_of_cw_motion(self) -> None:
         """_summary_
@@ -225,16 +263,45 @@ class MotorController(BaseController):
     def add_cls_specific_arguments(parent: argparse.ArgumentParser) -> argparse.ArgumentParser:
         '''
             add_cls_specific_arguments
-                adds:
-                    --disable-motor-controller argument which disables the motors when set
+                adds the motor controller's arguments. --disable-motor-controller is added by run.py
+                for every registered controller, see Client.Controllers
 
             @args:
                 parent (argparse.ArgumentParser): argparse object from run.py
             
         '''
         parser = parent.add_argument_group('MotorController')
-        parser.add_argument('--disable-motor-controller', action='store_true')
+        parser.add_argument('--control-rate', type=float, default=100., help='motor control loop rate (Hz)')
+        parser.add_argument('--power-poll-rate', type=float, default=10., help='power board telemetry rate (Hz)')
+        parser.add_argument('--max-linear-accel', type=float, default=2000., help='setpoint ramp limit (mm/s^2), 0 disables')
+        parser.add_argument('--max-angular-accel', type=float, default=20., help='setpoint ramp limit (rad/s^2), 0 disables')
+        parser.add_argument('--max-linear-jerk', type=float, default=20000., help='setpoint ramp limit (mm/s^3), 0 disables')
+        parser.add_argument('--max-angular-jerk', type=float, default=200., help='setpoint ramp limit (rad/s^3), 0 disables')
+        parser.add_argument('--motor-transport', choices=('pi3hat', 'simulated'), default='pi3hat')
+        parser.add_argument('--sim-latency', type=float, default=.001, help='seconds per simulated CAN cycle')
+        parser.add_argument('--sim-jitter', type=float, default=0., help='random extra seconds per simulated CAN cycle')
+        parser.add_argument('--sim-fault-rate', type=float, default=0., help='probability of a fault per servo and cycle')
+        parser.add_argument('--sim-drop-rate', type=float, default=0., help='probability of a missing query reply')
         return parent
+
+    @classmethod
+    def make_transport(cls, args: argparse.Namespace):
+        '''
+            make_transport() - transport selected by --motor-transport
+
+            @returns
+                None for the pi3hat (created by __init__), otherwise a `SimulatedTransport`
+        '''
+        if getattr(args, 'motor_transport', 'pi3hat') != 'simulated':
+            return None
+        from Client.Controllers.Simulated import SimulatedTransport
+        return SimulatedTransport(
+            cls.SERVO_BUS_MAP,
+            latency=args.sim_latency,
+            jitter=args.sim_jitter,
+            fault_rate=args.sim_fault_rate,
+            drop_rate=args.sim_drop_rate
+        )
     
     async def _exit(self):
         await self._make_stop()
@@ -251,6 +318,9 @@ class MotorController(BaseController):
         if not isinstance(u, int):
             raise ValueError
         self._u = u
+        self.set_wheel_xy_location()
+        self.set_wheel_radius()
+        self.set_jacobian()
     
     @property
     def interval(self): # action time interval (ms)
@@ -265,7 +335,8 @@ class MotorController(BaseController):
 class MotorControllerFactory:
     @staticmethod
     def __call__(shared_global_resource, event, args) -> None:
-        motor = MotorController(shared_global_resource)
+        motor = MotorController(shared_global_resource, MotorController.make_transport(args))
+        motor.watchdog = CommandWatchdog(args.command_ttl)
         motor.tc_action_recv_event = event['tc_action_recv_event']
         motor.gc_force_shutdown_event = event['gc_force_shutdown_event']
         asyncio.run(motor.run())
\ No newline at end of file
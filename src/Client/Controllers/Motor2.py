@@ -1,26 +1,61 @@
 '''re-implmentation of Motor.py for real-time response'''
 from Client.Controllers.Motor import MotorController
+from Client.Controllers.Scheduler import FixedRateScheduler
+from Client.Controllers.Watchdog import CommandWatchdog
+from Client.Controllers.Setpoint import SetpointGenerator
 from Client.Shared.Action import Action
+from Client.Shared.Trajectory import Trajectory
+from Client.Tracer import tracer
+from Client.TraceLog import tracelog
 import math
 import time
 import asyncio
-import moteus
 import logging
 
 log = logging.getLogger()
-log.setLevel(logging.NOTSET)
+
+TWIST = tracelog.event('twist', 'seq={0} vx={1:.1f} vy={2:.1f} w={3:.3f}') # command before the setpoint ramp
+
+try:
+    import moteus
+    from moteus import Register
+except ImportError as e:
+    log.warning(e)
+    from Client.Controllers.Simulated import Register
+from Client.Controllers.Simulated import PowerRegister # moteus has no enum for the power board registers
 
 class MotorController2(MotorController):
+    def __init__(self, shared_global_resource, transport=None, control_rate: float=100., power_poll_rate: float=10.) -> None:
+        """
+            motor controller sending one CAN cycle per tick of a fixed rate scheduler
+        Args:
+            control_rate (float): CAN cycles per second
+            power_poll_rate (float): power board queries per second, sent in the same CAN cycle as the wheels
+        """
+        super().__init__(shared_global_resource, transport)
+        self.scheduler = FixedRateScheduler(control_rate)
+        self.power_query = self.make_power_query()
+        self.power_poll_interval: int = max(1, round(control_rate / power_poll_rate)) # ticks
+        self._tick: int = 0
+        self._wheel_velocity: list[float] = [0.] * 4
+        self._wheel_fault: list[int] = [0] * 4
+        self.setpoint = SetpointGenerator()
+        tracer.attach('control_jitter', self.scheduler.jitter)
+
     def do(self, action: Action):
         '''
             do() - implements BaseController do()
         '''
        
-        vx = getattr(action, 'vx', 0.) # positive vx is the robot's forward (kicker as the front) movement
-        vy = getattr(action, 'vy', 0.) # positive vy is the robots normal movement (left side of the kicker)
-        vw = getattr(action, 'w', 0.) # positive w is the robots ccw spin
+        if isinstance(action, Trajectory): # follow the trajectory from when it was received
+            vx, vy, vw = action.sample((time.monotonic_ns() - action.recv_ns) * 1e-9)
+        else:
+            vx = getattr(action, 'vx', 0.) # positive vx is the robot's forward (kicker as the front) movement
+            vy = getattr(action, 'vy', 0.) # positive vy is the robots normal movement (left side of the kicker)
+            vw = getattr(action, 'w', 0.) # positive w is the robots ccw spin
 
-        log.debug(f"{vx=}, {vy=}, {vw=}")
+        tracelog.record(TWIST, action.seq, vx, vy, vw)
+        vw, vx, vy = self.setpoint.step((vw, vx, vy), self.scheduler.period_ns * 1e-9) # ramp towards the command once per control period
 
         # if vx, vy and vw are all 0s, stop the motors
 
@@ -37,42 +72,108 @@ class MotorController2(MotorController):
                 query=True
             ) for id, velocity in enumerate([v1, v2, v3, v4]) # send a velocity only command to the moetus controller
         ]
+        tracer.mark('motor_do', action.recv_ns)
 
     async def run(self) -> None:
         '''
             run() - overloads BaseController run()
         '''
-        ts = time.time() + 0.05 # interval of action
         await self._make_stop() # clear any faults with the meotus controllers
-        while True:
-            try:
-                action = self.shared_global_resource.get_action() 
-                if not isinstance(action, Action): # if the action is invalid, stop the robot
-                  log.critical(f"unexpected type: expected 'Action', got: {action.__class__}")
-                  action = Action(robot_id=0)
-                  await self._make_stop()
-                # self._tc_action_recv_event.clear()
-            except KeyboardInterrupt: # if a ctrl-c or ctrl-d interrupt is sent (via ssh), perform the _exit co-routinue 
-                await self._exit()
-            except asyncio.CancelledError: # catch the cancelled error just in case
-                await self._exit()
+        self.scheduler.reset()
+        try:
+            while True:
+                try:
+                    action = self.shared_global_resource.get_action() 
+                    if not isinstance(action, Action): # if the action is invalid, stop the robot
+                      if not self._invalid_action:
+                          log.critical(f"unexpected type: expected 'Action', got: {action.__class__}")
+                          self._invalid_action = True
+                      action = Action(robot_id=0)
+                      await self._make_stop()
+                    else:
+                      self._invalid_action = False
+                    # self._tc_action_recv_event.clear()
+                except KeyboardInterrupt: # if a ctrl-c or ctrl-d interrupt is sent (via ssh), perform the _exit co-routinue 
+                    await self._exit()
         
-            if time.time() < ts: # get new data from the shared global resource every internal
-                if time.time() > action._time + 1000: # if the action hasn't been updated in over a second, stop the robot
+                if not self.watchdog.fresh(action): # if the command expired, stop the robot this cycle
                     action = Action(robot_id=0)
+                    self.setpoint.reset()
                 self.do(action) # calculate new wheel velocities
-                results = await self.transport.cycle(self.query) # send the wheel velocities to the motor controllers
-                for i in range(4): # each motor controller has query=True, check the registers for a fault state
-                    mc_fault_status = results[i].values[moteus.Register.FAULT] 
+                poll_power = self._tick % self.power_poll_interval == 0 # every few ticks, ask the power board too
+                self._tick += 1
+                commands = self.query + [self.power_query] if poll_power else self.query
+                results = await self.transport.cycle(commands) # send the wheel velocities to the motor controllers
+                tracer.mark('can_cycle', action.recv_ns)
+                self.publish_wheels(results)
+                for result in results: # each motor controller has query=True, check the registers for a fault state
+                    mc_fault_status = result.values.get(Register.FAULT, 0)
                     if not mc_fault_status == 0:
-                        self._make_stop() 
+                        log.error(f'moteus {result.id} fault {mc_fault_status}, stopping')
+                        await self._make_stop()
+                        break
 
-                ts = time.time() + 0.1 # update the interval
+                if poll_power:
+                    self.publish_power(results)
 
-            # power_telemetry = await self.steam.read_data("power")
-            # log.info(power_telemetry)
-            # self.shared_global_resource.set_voltage(power_telemetry.output_voltage_V)
-            # self.shared_global_resource.set_current(power_telemetry.output_current_A)
+                await self.scheduler.wait() # sleep until the next control period
+        except BaseException: # cancelled or failed: stop the motors, then let the exception through
+            try:
+                await self._exit()
+            except Exception as e:
+                log.error(f'could not stop the motors: {e}')
+            raise
+
+    def make_power_query(self):
+        '''
+            make_power_query() - query of the power board's output voltage and current
+        '''
+        if hasattr(self.transport, 'make_controller'): # the simulated power board always replies with its registers
+            return self.diagnostics.make_query()
+        resolution = moteus.QueryResolution()
+        # the servo registers do not exist on the power board. they are class attributes, vars() would not list them
+        for field in dir(resolution):
+            if not field.startswith('_') and not callable(getattr(resolution, field)):
+                setattr(resolution, field, moteus.IGNORE)
+        resolution._extra = {
+            PowerRegister.OUTPUT_VOLTAGE: moteus.F32,
+            PowerRegister.OUTPUT_CURRENT: moteus.F32,
+        }
+        return self.diagnostics.make_query(query_resolution=resolution)
+
+    def publish_wheels(self, results) -> None:
+        '''
+            publish_wheels() - publishes the wheel velocities and fault codes from the replies of a CAN cycle.
+                wheels without a reply keep their last value
+
+            @args
+                results (list): replies returned by `transport.cycle()`
+        '''
+        for result in results:
+            wheel = result.id - 1
+            if 0 <= wheel < 4:
+                self._wheel_velocity[wheel] = result.values.get(Register.VELOCITY, 0.)
+                self._wheel_fault[wheel] = result.values.get(Register.FAULT, 0)
+        self.shared_global_resource.set_wheels(self._wheel_velocity, self._wheel_fault)
+
+    def publish_power(self, results) -> None:
+        '''
+            publish_power() - publishes the battery voltage and current from the replies of a CAN cycle.
+                without a power board reply, the mean bus voltage reported by the servos is used instead
+
+            @args
+                results (list): replies returned by `transport.cycle()`
+        '''
+        voltages = []
+        for result in results:
+            if result.id == self.diagnostics.id:
+                self.shared_global_resource.set_voltage(result.values[PowerRegister.OUTPUT_VOLTAGE])
+                self.shared_global_resource.set_current(result.values[PowerRegister.OUTPUT_CURRENT])
+                return
+            if Register.VOLTAGE in result.values:
+                voltages.append(result.values[Register.VOLTAGE])
+        if voltages:
+            self.shared_global_resource.set_voltage(sum(voltages) / len(voltages))
 
 
 class MotorController2Factory:
@@ -85,7 +186,17 @@ class MotorController2Factory:
             shared_global_resource (TeamControl.SharedGlobalResource) interprocess communication messaging object
             event (list[multiprocessing.Event]): list of mutliprocessing.Event objects to signal the process to do various actions
         '''
-        motor = MotorController2(shared_global_resource)
+        motor = MotorController2Factory.make(shared_global_resource, args)
         motor.tc_action_recv_event = event['tc_action_recv_event'] # not in use
         motor.gc_force_shutdown_event = event['gc_force_shutdown_event'] # not in use
-        asyncio.run(motor.run()) # motor controller functions are all asynchronous functions
\ No newline at end of file
+        asyncio.run(motor.run()) # motor controller functions are all asynchronous functions
+
+    @staticmethod
+    def make(shared_global_resource, args) -> MotorController2:
+        '''
+            make() - motor controller configured from `args`, not yet running
+        '''
+        motor = MotorController2(shared_global_resource, MotorController2.make_transport(args), args.control_rate, args.power_poll_rate)
+        motor.watchdog = CommandWatchdog(args.command_ttl)
+        motor.setpoint = SetpointGenerator.from_args(args)
+        return motor
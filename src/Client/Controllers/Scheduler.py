@@ -0,0 +1,67 @@
+'''fixed rate scheduling of controller loops'''
+from Client.Tracer import LatencyHistogram
+import asyncio
+import time
+import logging
+
+log = logging.getLogger()
+
+class FixedRateScheduler:
+    def __init__(self, rate: float) -> None:
+        """
+            fixed period scheduler on the monotonic clock. deadlines advance by exactly one period from the
+            first tick, so waking up late never accumulates into drift. a tick that overruns its period is
+            followed straight away by the next one, and any further deadlines it swallowed are skipped
+            rather than run back to back
+        attributes:
+            rate (float): ticks per second
+            ticks (int): completed waits
+            overruns (int): ticks that started after the following deadline had already passed
+            missed (int): deadlines skipped because of overruns
+            jitter (LatencyHistogram): how late each tick started after its deadline (ns)
+        """
+        if rate <= 0:
+            raise ValueError(f'rate must be positive, got {rate}')
+        self.rate: float = rate
+        self.period_ns: int = round(1e9 / rate)
+        self.ticks: int = 0
+        self.overruns: int = 0
+        self.missed: int = 0
+        self.jitter = LatencyHistogram()
+        self._deadline: int = None
+
+    async def wait(self) -> None:
+        '''
+            wait() - sleeps until the next deadline
+        '''
+        now = time.monotonic_ns()
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += self.period_ns
+        if now > self._deadline:
+            self.overruns += 1
+            missed = (now - self._deadline) // self.period_ns
+            self.missed += missed
+            self._deadline += missed * self.period_ns
+        else:
+            await asyncio.sleep((self._deadline - now) / 1e9)
+        self.jitter.record(time.monotonic_ns() - self._deadline)
+        self.ticks += 1
+
+    def reset(self) -> None:
+        '''
+            reset() - starts a new series of deadlines from the next wait()
+        '''
+        self._deadline = None
+
+    def stats(self) -> dict:
+        '''
+            stats() - tick, overrun and jitter statistics
+        '''
+        return {
+            'rate_hz': self.rate,
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'missed': self.missed,
+            **{f'jitter_{k}': v for k, v in self.jitter.summary().items() if k != 'count'},
+        }
@@ -0,0 +1,73 @@
+'''acceleration and jerk limited setpoint generation for the motor control loop'''
+import numpy as np
+import logging
+
+log = logging.getLogger()
+
+class SetpointGenerator:
+    def __init__(self, max_linear_accel: float=2000., max_angular_accel: float=20., max_linear_jerk: float=20000., max_angular_jerk: float=200.) -> None:
+        """
+            ramps the body twist (w, vx, vy) towards the latest commanded twist once per control period, so a
+            sparse stream of commands turns into smooth wheel setpoints. each axis is limited independently;
+            the acceleration is ramped down ahead of the target so it is reached without overshoot.
+            a limit of 0 disables it
+        Args:
+            max_linear_accel (float): vx and vy acceleration limit (mm/s^2)
+            max_angular_accel (float): w acceleration limit (rad/s^2)
+            max_linear_jerk (float): vx and vy jerk limit (mm/s^3)
+            max_angular_jerk (float): w jerk limit (rad/s^3)
+        attributes:
+            velocity (np.ndarray (3,)): current setpoint (w, vx, vy)
+            acceleration (np.ndarray (3,)): current rate of change of the setpoint
+        """
+        limits = np.array((
+            (max_angular_accel, max_linear_accel, max_linear_accel),
+            (max_angular_jerk, max_linear_jerk, max_linear_jerk),
+        ), dtype=float)
+        if (limits < 0).any():
+            raise ValueError(f'limits must not be negative, got {limits}')
+        limits[limits == 0] = np.inf
+        self.max_accel, self.max_jerk = limits
+        self._jerk_limited = np.isfinite(self.max_jerk)
+        self.velocity = np.zeros(3)
+        self.acceleration = np.zeros(3)
+
+    def step(self, target, dt: float) -> np.ndarray:
+        '''
+            step() - advances the setpoint by `dt` seconds towards `target`
+
+            @args
+                target (array (3,)): commanded twist (w, vx, vy)
+                dt (float): control period in seconds
+            @returns
+                np.ndarray (3,) - the new setpoint (w, vx, vy)
+        '''
+        error = np.asarray(target, dtype=float) - self.velocity
+        # fastest acceleration from which the axis still comes to rest on the target when ramped down by
+        # max jerk every period: a * (a + j * dt) / (2 * j) = |error|
+        jerk = self.max_jerk * dt
+        with np.errstate(invalid='ignore'):
+            braking = (np.sqrt(jerk * jerk + 8 * self.max_jerk * np.abs(error)) - jerk) / 2
+        desired = np.minimum(np.where(self._jerk_limited, braking, np.inf), self.max_accel)
+        desired = np.where(error == 0, 0., np.copysign(desired, error))
+        self.acceleration += np.clip(desired - self.acceleration, -jerk, jerk)
+        step = self.acceleration * dt
+        # axes whose step reaches the target land on it
+        arrived = step * error >= error * error
+        self.velocity = np.where(arrived, target, self.velocity + step)
+        self.acceleration[arrived] = 0.
+        return self.velocity
+
+    def reset(self) -> None:
+        '''
+            reset() - drops the setpoint to rest, e.g. when the command expired and the motors were stopped
+        '''
+        self.velocity = np.zeros(3)
+        self.acceleration = np.zeros(3)
+
+    @classmethod
+    def from_args(cls, args) -> object:
+        '''
+            from_args() - SetpointGenerator with the limits given on the command line
+        '''
+        return cls(args.max_linear_accel, args.max_angular_accel, args.max_linear_jerk, args.max_angular_jerk)
@@ -0,0 +1,262 @@
+'''simulated moteus servos and pi3hat router for running the motor controller without hardware'''
+import asyncio
+import enum
+import math
+import random
+import time
+import logging
+
+log = logging.getLogger()
+
+class Register(enum.IntEnum):
+    # register numbers of `moteus.Register` reported by a default query
+    MODE = 0x000
+    POSITION = 0x001
+    VELOCITY = 0x002
+    TORQUE = 0x003
+    VOLTAGE = 0x00d
+    TEMPERATURE = 0x00e
+    FAULT = 0x00f
+
+class PowerRegister(enum.IntEnum):
+    # registers reported by the simulated power board
+    STATE = 0x000
+    FAULT = 0x001
+    OUTPUT_VOLTAGE = 0x010
+    OUTPUT_CURRENT = 0x011
+    TEMPERATURE = 0x012
+
+class Mode(enum.IntEnum):
+    # subset of the moteus modes
+    STOPPED = 0
+    FAULT = 1
+    POSITION = 10
+
+POWER_BOARD_ID: int = 32
+
+
+class SimulatedCommand:
+    def __init__(self, destination: int, mode: Mode, velocity: float=0., reply_required: bool=False) -> None:
+        '''
+            command built by `SimulatedController`, carries the same `destination` and `reply_required`
+            attributes as `moteus.Command`
+        '''
+        self.destination = destination
+        self.mode = mode
+        self.velocity = velocity
+        self.reply_required = reply_required
+
+
+class SimulatedResult:
+    def __init__(self, id: int, bus: int, values: dict) -> None:
+        '''
+            reply to a query, with the `id`, `bus` and register indexed `values` of a `moteus` result
+        '''
+        self.id = id
+        self.arbitration_id = id << 8
+        self.bus = bus
+        self.values = values
+
+    def __repr__(self) -> str:
+        return f'SimulatedResult(id={self.id}, bus={self.bus}, values={self.values})'
+
+
+class SimulatedController:
+    def __init__(self, id: int, transport) -> None:
+        '''
+            stands in for `moteus.Controller`: builds commands for the `SimulatedTransport`
+        '''
+        self.id = id
+        self.transport = transport
+
+    def make_position(self, position: float=math.nan, velocity: float=math.nan, query: bool=False, **kwargs) -> SimulatedCommand:
+        if math.isnan(velocity):
+            velocity = 0.
+        return SimulatedCommand(self.id, Mode.POSITION, velocity, query)
+
+    def make_stop(self, query: bool=False) -> SimulatedCommand:
+        return SimulatedCommand(self.id, Mode.STOPPED, 0., query)
+
+    def make_query(self) -> SimulatedCommand:
+        return SimulatedCommand(self.id, None, 0., True)
+
+    async def set_position(self, **kwargs):
+        return await self._single(self.make_position(**kwargs))
+
+    async def set_stop(self, **kwargs):
+        return await self._single(self.make_stop(**kwargs))
+
+    async def query(self):
+        return await self._single(self.make_query())
+
+    async def _single(self, command: SimulatedCommand):
+        results = await self.transport.cycle([command])
+        return results[0] if results else None
+
+
+class SimulatedServo:
+    # first order response of the wheel velocity to the command
+    TIME_CONSTANT: float = .05 # seconds
+    TORQUE_PER_ACCELERATION: float = .002 # Nm per rev/s^2
+    AMBIENT_TEMPERATURE: float = 30. # C
+    HEATING_PER_NM2: float = 2. # C/s per Nm^2
+    COOLING: float = .05 # 1/s
+
+    def __init__(self, id: int, bus: int) -> None:
+        """
+            simulated moteus servo driving a wheel in velocity mode
+        attributes:
+            mode (Mode): current control mode
+            fault (int): moteus fault code, 0 when healthy
+            position (float): revolutions
+            velocity (float): revolutions per second
+            torque (float): Nm
+            temperature (float): C
+        """
+        self.id = id
+        self.bus = bus
+        self.mode: Mode = Mode.STOPPED
+        self.fault: int = 0
+        self.target: float = 0.
+        self.position: float = 0.
+        self.velocity: float = 0.
+        self.torque: float = 0.
+        self.temperature: float = self.AMBIENT_TEMPERATURE
+
+    def apply(self, command: SimulatedCommand) -> None:
+        if command.mode == Mode.STOPPED: # like moteus, a stop command also clears a fault
+            self.mode = Mode.STOPPED
+            self.fault = 0
+            self.target = 0.
+        elif command.mode == Mode.POSITION and self.mode != Mode.FAULT:
+            self.mode = Mode.POSITION
+            self.target = command.velocity
+
+    def step(self, dt: float) -> None:
+        target = self.target if self.mode == Mode.POSITION else 0.
+        acceleration = (target - self.velocity) / self.TIME_CONSTANT if self.mode == Mode.POSITION else 0.
+        if self.mode == Mode.POSITION:
+            self.velocity += (target - self.velocity) * min(dt / self.TIME_CONSTANT, 1.)
+        else: # free wheeling
+            self.velocity *= max(1. - dt / (4 * self.TIME_CONSTANT), 0.)
+        self.position += self.velocity * dt
+        self.torque = acceleration * self.TORQUE_PER_ACCELERATION
+        self.temperature += (self.HEATING_PER_NM2 * self.torque ** 2 - self.COOLING * (self.temperature - self.AMBIENT_TEMPERATURE)) * dt
+
+    def set_fault(self, code: int) -> None:
+        self.mode = Mode.FAULT
+        self.fault = code
+        self.target = 0.
+
+    def values(self, voltage: float) -> dict:
+        return {
+            Register.MODE: int(self.mode),
+            Register.POSITION: self.position,
+            Register.VELOCITY: self.velocity,
+            Register.TORQUE: self.torque,
+            Register.VOLTAGE: voltage,
+            Register.TEMPERATURE: self.temperature,
+            Register.FAULT: self.fault,
+        }
+
+
+class SimulatedPowerBoard:
+    BATTERY_VOLTAGE: float = 24. # V
+    INTERNAL_RESISTANCE: float = .05 # Ohm
+    IDLE_CURRENT: float = .3 # A
+    AMPS_PER_NM: float = 8. # A per Nm of wheel torque
+
+    def __init__(self, bus: int) -> None:
+        """
+            simulated power distribution board, its output sags with the current drawn by the servos
+        """
+        self.id = POWER_BOARD_ID
+        self.bus = bus
+        self.current: float = self.IDLE_CURRENT
+        self.fault: int = 0
+
+    def step(self, servos) -> None:
+        self.current = self.IDLE_CURRENT + self.AMPS_PER_NM * sum(abs(servo.torque) for servo in servos)
+
+    @property
+    def voltage(self) -> float:
+        return self.BATTERY_VOLTAGE - self.INTERNAL_RESISTANCE * self.current
+
+    def values(self) -> dict:
+        return {
+            PowerRegister.STATE: 2, # power on
+            PowerRegister.FAULT: self.fault,
+            PowerRegister.OUTPUT_VOLTAGE: self.voltage,
+            PowerRegister.OUTPUT_CURRENT: self.current,
+            PowerRegister.TEMPERATURE: 35.,
+        }
+
+
+class SimulatedTransport:
+    # moteus fault codes drawn for random faults
+    FAULT_CODES: tuple[int, ...] = (33, 37, 38, 40) # motor driver, pwm cycle overrun, over temperature, under voltage
+
+    def __init__(self, servo_bus_map: dict, latency: float=.001, jitter: float=0., fault_rate: float=0., drop_rate: float=0., seed: int=None) -> None:
+        """
+            stands in for `moteus_pi3hat.Pi3HatRouter`: same `cycle()` contract, simulating a servo for every
+            id in `servo_bus_map` and the power board at id 32
+        attributes:
+            latency (float): seconds each cycle takes
+            jitter (float): up to this many extra seconds are added to each cycle at random
+            fault_rate (float): probability per cycle and servo of a random fault
+            drop_rate (float): probability that a requested reply goes missing
+            cycles (int): number of completed cycles
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.fault_rate = fault_rate
+        self.drop_rate = drop_rate
+        self.cycles: int = 0
+        self._random = random.Random(seed)
+        self.servos: dict[int, SimulatedServo] = dict()
+        self.power_board: SimulatedPowerBoard = None
+        for bus, ids in servo_bus_map.items():
+            for id in ids:
+                if id == POWER_BOARD_ID:
+                    self.power_board = SimulatedPowerBoard(bus)
+                else:
+                    self.servos[id] = SimulatedServo(id, bus)
+        self._last = time.monotonic()
+
+    def make_controller(self, id: int) -> SimulatedController:
+        return SimulatedController(id, self)
+
+    def inject_fault(self, id: int, code: int) -> None:
+        '''
+            inject_fault() - puts servo `id` into the fault mode until it receives a stop command
+        '''
+        self.servos[id].set_fault(code)
+
+    async def cycle(self, commands, request_attitude: bool=False, force_can_check=None) -> list[SimulatedResult]:
+        commands = list(commands)
+        delay = self.latency + (self._random.uniform(0., self.jitter) if self.jitter else 0.)
+        await asyncio.sleep(delay)
+
+        now = time.monotonic()
+        dt, self._last = now - self._last, now
+        for servo in self.servos.values():
+            if self.fault_rate and self._random.random() < self.fault_rate:
+                servo.set_fault(self._random.choice(self.FAULT_CODES))
+            servo.step(dt)
+        if self.power_board is not None:
+            self.power_board.step(self.servos.values())
+
+        results = []
+        voltage = self.power_board.voltage if self.power_board is not None else SimulatedPowerBoard.BATTERY_VOLTAGE
+        for command in commands:
+            servo = self.servos.get(command.destination)
+            if servo is not None and command.mode is not None:
+                servo.apply(command)
+            if not command.reply_required or self.drop_rate and self._random.random() < self.drop_rate:
+                continue
+            if servo is not None:
+                results.append(SimulatedResult(servo.id, servo.bus, servo.values(voltage)))
+            elif self.power_board is not None and command.destination == POWER_BOARD_ID:
+                results.append(SimulatedResult(POWER_BOARD_ID, self.power_board.bus, self.power_board.values()))
+        self.cycles += 1
+        return results
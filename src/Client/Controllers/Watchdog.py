@@ -0,0 +1,42 @@
+'''command deadline watchdog'''
+from Client.Shared.Action import Action
+import time
+import logging
+
+log = logging.getLogger()
+
+class CommandWatchdog:
+    def __init__(self, ttl: float=.25) -> None:
+        """
+            expires commands `ttl` seconds after they were received, or after the end of a trajectory.
+            uses the receiver's `Action.recv_ns` (time.monotonic_ns) so neither the sender's clock nor
+            wall clock steps can keep a command alive
+        attributes:
+            ttl (float): seconds a command stays valid after it was received
+            expiries (int): commands that expired before a newer one replaced them
+        """
+        if ttl <= 0:
+            raise ValueError(f'ttl must be positive, got {ttl}')
+        self.ttl: float = ttl
+        self.ttl_ns: int = int(ttl * 1e9)
+        self.expiries: int = 0
+        self._expired: int = None # recv_ns of the last command counted as expired
+
+    def fresh(self, action: Action) -> bool:
+        '''
+            fresh() - checks whether `action` is still within its deadline, counting each expired command once
+
+            @args
+                action (Action): latest command read from the shared resource
+            @returns
+                bool - False if `action` expired or was never received over the network
+        '''
+        recv_ns = action.recv_ns
+        if recv_ns and time.monotonic_ns() - recv_ns <= self.ttl_ns + action.duration * 1e9:
+            return True
+        if recv_ns != self._expired:
+            self._expired = recv_ns
+            if recv_ns:
+                self.expiries += 1
+                log.warning(f'command {action.seq} expired after {self.ttl}s, stopping ({self.expiries} expiries)')
+        return False
@@ -1,2 +1,6 @@
-from Client.Controllers.Arduino import ArduinoController, ArduinoControllerFactory
-from Client.Controllers.Motor2 import MotorController2, MotorController2Factory
\ No newline at end of file
+'''controllers run.py can start, imported only when they are enabled'''
+from Client.Registry import Registry
+
+controllers = Registry('controller')
+controllers.register('motor', 'Client.Controllers.Motor2', 'MotorController2', 'MotorController2Factory', 'moteus servos on the pi3hat CAN bus (numpy, moteus, moteus_pi3hat)')
+controllers.register('arduino', 'Client.Controllers.Arduino', 'ArduinoController', 'ArduinoControllerFactory', 'kicker, dribbler and ball sensor over serial (pyserial)')
@@ -0,0 +1,81 @@
+'''forwards actions from the receiver queue to the controllers'''
+from Client.Shared.Action import Action
+from Client.Tracer import tracer
+import multiprocessing
+import queue
+import logging
+
+log = logging.getLogger()
+
+class Dispatcher:
+    def __init__(self) -> None:
+        """
+            blocks on the receiver queue until an action arrives, drains every action that is already
+            pending and publishes only the newest one to the shared global resource
+        attributes:
+            dispatched (multiprocessing.Value): actions published to the shared global resource
+            coalesced (multiprocessing.Value): actions superseded by a newer action in the same drain
+            dropped (multiprocessing.Value): actions discarded because a controller event was set
+        """
+        self.dispatched = multiprocessing.Value('Q', 0, lock=False)
+        self.coalesced = multiprocessing.Value('Q', 0, lock=False)
+        self.dropped = multiprocessing.Value('Q', 0, lock=False)
+
+    def __call__(self, q: multiprocessing.Queue, shared_global_resource, events: list) -> None:
+        '''
+        __call__() - forwards actions from `q` to `shared_global_resource` until the process is terminated
+
+        @args
+            q (multiprocessing.Queue): actions from the receiver
+            shared_global_resource: inter-process communication messaging object
+            events (list[multiprocessing.Event]): actions are dropped while any of these are set
+        '''
+        while True:
+            action = q.get() # sleep until the receiver wakes us up
+            action, pending = self.drain(q, action)
+            self.coalesced.value += pending
+
+            if any(event.is_set() for event in events):
+                self.dropped.value += 1
+                continue
+
+            if not isinstance(action, Action):
+                raise TypeError(f'action is not type: {Action}, got {type(action)}')
+            tracer.mark('dispatch', action.recv_ns)
+            # set the shared namespace variable `action`
+            # to the newest recved action
+            shared_global_resource.set_action(action)
+            self.dispatched.value += 1
+
+    @staticmethod
+    def drain(q: multiprocessing.Queue, action: Action) -> tuple[Action, int]:
+        '''
+        drain() - takes every action already waiting in `q` without blocking
+
+        @args
+            q (multiprocessing.Queue): actions from the receiver
+            action (Action): action already taken from `q`
+
+        @returns
+            (Action, int) - the newest action and the number of older actions it superseded
+        '''
+        pending = 0
+        while True:
+            try:
+                action = q.get_nowait()
+            except queue.Empty:
+                return action, pending
+            pending += 1
+
+    def stats(self) -> dict:
+        '''
+        stats() - snapshot of the dispatcher counters
+
+        @returns
+            dict - dispatched, coalesced and dropped action counts
+        '''
+        return {
+            'dispatched': self.dispatched.value,
+            'coalesced': self.coalesced.value,
+            'dropped': self.dropped.value,
+        }
@@ -0,0 +1,155 @@
+'''cpu affinity and real-time scheduling of the robot's processes'''
+import argparse
+import os
+import resource
+import logging
+
+log = logging.getLogger()
+
+# processes started by run.py. with --single-process everything runs in the motor loop's process
+ROLES: tuple[str, ...] = ('receiver', 'dispatcher', 'motor', 'arduino', 'telemetry')
+
+class ProcessPlacement:
+    def __init__(self, affinity: dict[str, set[int]]=None, fifo_priority: dict[str, int]=None) -> None:
+        """
+            cpus each process may run on, and the processes that run under SCHED_FIFO. each process applies
+            its own settings when it starts, through `wrap()` or `apply()`
+        attributes:
+            affinity (dict[str, set[int]]): cpus per role, roles without an entry may run on any cpu
+            fifo_priority (dict[str, int]): SCHED_FIFO priority per role, roles without an entry keep SCHED_OTHER
+        """
+        self.affinity = affinity if affinity is not None else dict()
+        self.fifo_priority = fifo_priority if fifo_priority is not None else dict()
+
+    def check(self, roles: tuple[str, ...]=ROLES) -> list[str]:
+        '''
+            check() - finds the settings that cannot be applied, before any process is started
+
+            @args
+                roles (tuple[str, ...]): roles that will be applied, settings of any other role are reported
+
+            @returns
+                list[str] - one line per setting that will not take effect
+        '''
+        problems = []
+        for role in sorted((self.affinity.keys() | self.fifo_priority.keys()) - set(roles)):
+            problems.append(f'{role}: no separate {role} process is started, its settings are ignored')
+        if self.affinity:
+            if not hasattr(os, 'sched_setaffinity'):
+                problems.append('cpu affinity is not supported on this platform')
+            else:
+                available = os.sched_getaffinity(0)
+                for role, cpus in self.affinity.items():
+                    if not cpus <= available:
+                        problems.append(f'{role}: cpus {sorted(cpus - available)} are not available (available: {sorted(available)})')
+        for role, priority in self.fifo_priority.items():
+            if not hasattr(os, 'sched_setscheduler'):
+                problems.append(f'{role}: SCHED_FIFO is not supported on this platform')
+                continue
+            low, high = os.sched_get_priority_min(os.SCHED_FIFO), os.sched_get_priority_max(os.SCHED_FIFO)
+            if not low <= priority <= high:
+                problems.append(f'{role}: SCHED_FIFO priority {priority} is outside {low}..{high}')
+            elif os.geteuid() != 0 and resource.getrlimit(resource.RLIMIT_RTPRIO)[0] < priority:
+                problems.append(f'{role}: SCHED_FIFO priority {priority} needs root, CAP_SYS_NICE or a higher RLIMIT_RTPRIO')
+        return problems
+
+    def apply(self, role: str) -> list[str]:
+        '''
+            apply() - applies the settings of `role` to the calling process
+
+            @returns
+                list[str] - one line per setting that could not be applied
+        '''
+        problems = []
+        cpus = self.affinity.get(role)
+        if cpus is not None:
+            try:
+                os.sched_setaffinity(0, cpus)
+            except (OSError, AttributeError) as e:
+                problems.append(f'{role}: could not pin to cpus {sorted(cpus)}: {e}')
+        priority = self.fifo_priority.get(role)
+        if priority is not None:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+            except (OSError, AttributeError) as e:
+                problems.append(f'{role}: could not set SCHED_FIFO priority {priority}: {e}')
+        return problems
+
+    def wrap(self, role: str, target) -> 'PlacedTarget':
+        '''
+            wrap() - `multiprocessing.Process` target that applies the settings of `role` before calling `target`
+        '''
+        return PlacedTarget(self, role, target)
+
+    @staticmethod
+    def describe() -> str:
+        '''
+            describe() - cpus and scheduling policy of the calling process
+        '''
+        if not hasattr(os, 'sched_getscheduler'):
+            return 'default scheduling'
+        policy = os.sched_getscheduler(0)
+        name = {os.SCHED_OTHER: 'SCHED_OTHER', os.SCHED_FIFO: 'SCHED_FIFO', os.SCHED_RR: 'SCHED_RR'}.get(policy, str(policy))
+        return f'cpus {sorted(os.sched_getaffinity(0))}, {name} priority {os.sched_getparam(0).sched_priority}'
+
+    @staticmethod
+    def parse_cpus(text: str) -> set[int]:
+        '''
+            parse_cpus() - cpu list in the format of taskset and /sys/devices/system/cpu, e.g. "0,2-3"
+        '''
+        cpus = set()
+        for part in text.split(','):
+            first, _, last = part.partition('-')
+            cpus.update(range(int(first), int(last or first) + 1))
+        return cpus
+
+    @staticmethod
+    def from_args(args: argparse.Namespace) -> 'ProcessPlacement':
+        fifo_priority = {'motor': args.motor_fifo_priority} if args.motor_fifo_priority else dict()
+        return ProcessPlacement(dict(args.cpu_affinity or ()), fifo_priority)
+
+    @staticmethod
+    def add_cls_specific_arguments(parent: argparse.ArgumentParser) -> argparse.ArgumentParser:
+        '''
+            add_cls_specific_arguments() - adds the following arguments:
+                --cpu-affinity : ROLE=CPUS, pins a process to cpus, e.g. motor=3 or receiver=0-1. may be repeated
+                --motor-fifo-priority : runs the motor loop under SCHED_FIFO at this priority (1-99), 0 leaves it off
+
+            @args
+                parent (argparse.ArgumentParser) - argparse (from run.py)
+
+            @returns
+                parent (argparse.ArgumentParser)
+        '''
+        def role_cpus(text: str) -> tuple[str, set[int]]:
+            role, _, cpus = text.partition('=')
+            if role not in ROLES:
+                raise argparse.ArgumentTypeError(f'unknown process {role!r}, expected one of {", ".join(ROLES)}')
+            try:
+                parsed = ProcessPlacement.parse_cpus(cpus)
+            except ValueError:
+                raise argparse.ArgumentTypeError(f'bad cpu list {cpus!r}, expected e.g. 3 or 0,2-3')
+            if not parsed: # e.g. a reversed range, 3-1
+                raise argparse.ArgumentTypeError(f'cpu list {cpus!r} is empty, expected e.g. 3 or 0,2-3')
+            return role, parsed
+
+        parser = parent.add_argument_group('ProcessPlacement')
+        parser.add_argument('--cpu-affinity', type=role_cpus, action='append', metavar='ROLE=CPUS', help=f'pin a process ({", ".join(ROLES)}) to cpus, may be repeated')
+        parser.add_argument('--motor-fifo-priority', type=int, default=0, help='SCHED_FIFO priority of the motor loop (1-99), 0 leaves it off')
+        return parent
+
+
+class PlacedTarget:
+    def __init__(self, placement: ProcessPlacement, role: str, target) -> None:
+        '''
+            process target that applies `placement` to itself as `role` before running `target`
+        '''
+        self.placement = placement
+        self.role = role
+        self.target = target
+
+    def __call__(self, *args, **kwargs):
+        for problem in self.placement.apply(self.role):
+            log.warning(problem)
+        log.info(f'{self.role}: {self.placement.describe()}')
+        return self.target(*args, **kwargs)
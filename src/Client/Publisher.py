@@ -0,0 +1,80 @@
+'''sends the robot's status to the team controller'''
+from Client.Controllers.Scheduler import FixedRateScheduler
+from Client.Shared.RobotUDP import Sender
+from Client.Shared.Telemetry import Telemetry, TELEMETRY_STRUCT
+import argparse
+import asyncio
+import math
+import logging
+
+log = logging.getLogger()
+
+class TelemetryPublisher:
+    def __init__(self, host: str, port: int=50515, rate: float=20., robot_id: int=0) -> None:
+        """
+            samples the shared global resource at a fixed rate and sends one `Telemetry` datagram per tick.
+            runs in its own process on a non-blocking socket, so a slow network drops frames instead of
+            delaying the controllers
+        attributes:
+            sent (int): frames sent
+            dropped (int): frames the socket could not take
+        """
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.robot_id = robot_id if robot_id is not None else 0
+        self.sent: int = 0
+        self.dropped: int = 0
+
+    def __call__(self, shared_global_resource) -> None:
+        '''
+        __call__() - publishes the status in `shared_global_resource` until the process is terminated
+        '''
+        publisher = self.__class__(self.host, self.port, self.rate, self.robot_id)
+        asyncio.run(publisher.serve(shared_global_resource))
+
+    async def serve(self, shared_global_resource) -> None:
+        sender = Sender(ip='', port=0)
+        sender.sock.setblocking(False)
+        sender.update_destination((self.host, self.port))
+        log.info(f'sending telemetry to {self.host}:{self.port} at {self.rate}Hz')
+
+        scheduler = FixedRateScheduler(self.rate)
+        buffer = bytearray(TELEMETRY_STRUCT.size)
+        while True:
+            self.sample(shared_global_resource).pack_into(buffer)
+            try:
+                sender.sock.sendto(buffer, sender.destination)
+                self.sent += 1
+            except OSError: # full socket buffer or unreachable network, the next frame supersedes this one
+                self.dropped += 1
+            await scheduler.wait()
+
+    def sample(self, shared_global_resource) -> Telemetry:
+        '''
+            sample() - builds the next frame from the latest values in `shared_global_resource`
+        '''
+        voltage = shared_global_resource.get_voltage()
+        current = shared_global_resource.get_current()
+        wheels = shared_global_resource.get_wheels()
+        action = shared_global_resource.get_action()
+        ball = shared_global_resource.get_ball()
+        telemetry = Telemetry(
+            self.robot_id,
+            seq=(self.sent + self.dropped + 1) & 0xFFFFFFFF,
+            voltage=math.nan if voltage is None else voltage,
+            current=math.nan if current is None else current,
+            command_seq=0 if action is None else action.seq,
+            ball=ball is not None and ball[0],
+        )
+        if wheels is not None:
+            telemetry.wheel_velocity, telemetry.wheel_fault = wheels
+        return telemetry
+
+    @staticmethod
+    def add_cls_specific_arguments(parent: argparse.ArgumentParser) -> argparse.ArgumentParser:
+        parser = parent.add_argument_group('TelemetryPublisher')
+        parser.add_argument('--telemetry-host', type=str, default=None, help='team controller address, telemetry is off without it')
+        parser.add_argument('--telemetry-port', type=int, default=50515)
+        parser.add_argument('--telemetry-rate', type=float, default=20., help='status frames per second')
+        return parent
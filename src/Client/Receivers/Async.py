@@ -0,0 +1,109 @@
+'''asyncio re-implementation of Dummy.py without the fixed receive rate'''
+from Client.Receivers.Dummy import DummyReciever, RECEIVED
+from Client.Receivers.SequenceFilter import SequenceFilter
+from Client.Receivers.Recorder import DatagramRecorder
+from Client.Tracer import tracer
+from Client.TraceLog import tracelog
+from Client.Shared.Action import Action, decode_datagram, MAX_DATAGRAM_SIZE
+from typing import Callable
+import asyncio
+import socket
+import struct
+import time
+import logging
+
+log = logging.getLogger()
+
+class LatestActionProtocol(asyncio.DatagramProtocol):
+    def __init__(self, sock: socket.socket, robot_id: int, on_action: Callable[[Action], None], sequence_filter: SequenceFilter, buffer_size: int=MAX_DATAGRAM_SIZE, recorder: DatagramRecorder=None, max_reads: int=64) -> None:
+        """
+            datagram protocol which, on every wakeup, drains all datagrams waiting in the kernel buffer
+            and hands on only the newest action for each robot
+        attributes:
+            sock (socket.socket): non-blocking socket the transport is reading from
+            robot_id (int): only keep actions addressed to this robot, None keeps every action
+            on_action (Callable[[Action], None]): called with each newest action
+            sequence_filter (SequenceFilter): drops reordered and duplicated actions
+            buffer_size (int): largest datagram to read
+            recorder (DatagramRecorder): log every datagram read is appended to, None records nothing
+            max_reads (int): most datagrams read per wakeup, the rest is read on the next pass of the event loop
+            received (int): datagrams read from the socket
+            coalesced (int): actions superseded by a newer action in the same wakeup
+        """
+        self.sock = sock
+        self.robot_id = robot_id
+        self.on_action = on_action
+        self.sequence_filter = sequence_filter
+        self.buffer_size = buffer_size
+        self.recorder = recorder
+        self.max_reads = max_reads
+        self.received: int = 0
+        self.coalesced: int = 0
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        latest = dict()
+        self._keep(latest, data, addr)
+        # asyncio only reads one datagram per wakeup, read the rest of the backlog straight away. a flood
+        # could keep this loop going forever, so stop after `max_reads` and let the other tasks run
+        for _ in range(self.max_reads - 1):
+            try:
+                data, addr = self.sock.recvfrom(self.buffer_size)
+            except (BlockingIOError, InterruptedError):
+                break
+            self._keep(latest, data, addr)
+
+        for action in latest.values():
+            self.on_action(action)
+            tracer.mark('receive', action.recv_ns)
+
+    def error_received(self, exc: Exception) -> None:
+        log.warning(exc)
+
+    def _keep(self, latest: dict, data: bytes, addr: tuple[str, int]) -> None:
+        self.received += 1
+        recv_ns = time.monotonic_ns()
+        if self.recorder is not None:
+            self.recorder.append(data, addr, recv_ns)
+        try:
+            action = decode_datagram(data, self.robot_id)
+        except (ValueError, IndexError, struct.error) as e:
+            log.warning(f'dropping malformed datagram: {e}')
+            return
+        if action is None:
+            return
+        action.recv_ns = recv_ns # also the sequence filter's clock
+        if not self.sequence_filter.accept((addr, action.robot_id), action):
+            return
+        tracelog.record(RECEIVED, action.robot_id, action.seq, action.vx, action.vy, action.w)
+        if action.robot_id in latest:
+            self.coalesced += 1
+        latest[action.robot_id] = action
+
+
+class AsyncReciever(DummyReciever):
+    def recieve(self) -> None:
+        # check if we are connected
+        if self.socket is None:
+            raise UserWarning('connect() needs to be called before recv()')
+        # hand the newest action on as soon as it is read, no sleeping in between
+        asyncio.run(self.serve(self.recv.put_nowait))
+
+    async def serve(self, on_action: Callable[[Action], None]) -> None:
+        '''
+            serve() - reads actions from `socket` until cancelled
+
+            @args
+                on_action (Callable[[Action], None]): called with the newest action of every wakeup
+        '''
+        self.socket.setblocking(False)
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: LatestActionProtocol(self.socket, self.robot_id, on_action, self.sequence_filter, recorder=self.recorder),
+            sock=self.socket
+        )
+        try:
+            await loop.create_future() # run until cancelled
+        finally:
+            transport.close()
+            if self.recorder is not None:
+                self.recorder.close()
@@ -2,7 +2,6 @@ from multiprocessing import Queue
 import logging
 
 log = logging.getLogger()
-log.setLevel(logging.NOTSET)
 
 class BaseReceiver:
     def __init__(self, ip_addr='127.0.0.1', port=50514): # NOT IN USE
@@ -1,20 +1,33 @@
 import socket
-from Client.Shared.Action import Action
+import struct
+from Client.Shared.Action import Action, decode_datagram, MAX_DATAGRAM_SIZE
+from Client.Receivers.SequenceFilter import SequenceFilter
+from Client.Receivers.Recorder import DatagramRecorder
+from Client.Tracer import tracer
+from Client.TraceLog import tracelog
 import argparse
 import time
 import logging
 
 log = logging.getLogger()
-log.setLevel(logging.NOTSET)
+
+RECEIVED = tracelog.event('received', 'robot={0} seq={1:.0f} vx={2:.1f} vy={3:.1f} w={4:.3f}') # accepted action
 
 class DummyReciever():
-    def __init__(self, ip_addr='', port=50514) -> None:
+    def __init__(self, ip_addr='', port=50514, robot_id: int=None, multicast_group: str=None, record: str=None, record_size: int=64) -> None:
         self.ip_addr = ip_addr
         self.port = port
+        self.robot_id = robot_id # only pass on actions addressed to this robot, None passes on every action
+        self.multicast_group = multicast_group # multicast group to join, None for unicast/broadcast only
         self.recv = None # multiprocessing.Queue object
+        self.socket = None
+        self.sequence_filter = SequenceFilter() # drops reordered and duplicated actions
+        self.record = record # file every incoming datagram is appended to, None records nothing
+        self.record_size = record_size # megabytes preallocated for the recording
+        self.recorder: DatagramRecorder = None
 
     def __call__(self, queue) -> None:
-        recv = DummyReciever()  # make a reciever object
+        recv = self.__class__(self.ip_addr, self.port, self.robot_id, self.multicast_group, self.record, self.record_size)  # make a reciever object
         setattr(recv, 'recv', queue)  # set the attribute recv to hold the multiprocessing Queue to send action objects from UDP to run.py
         recv.connect() # open and bind to the socket
         recv.recieve() # listen to the socket
@@ -22,8 +35,15 @@ class DummyReciever():
     def connect(self) -> None:
         # sets up a UDP socket on local machine
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # allow every robot process on this machine to share a broadcast/multicast port
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         # bind to sock for listening
         self.socket.bind((self.ip_addr, self.port))
+        if self.multicast_group is not None:
+            membership = struct.pack('4s4s', socket.inet_aton(self.multicast_group), socket.inet_aton('0.0.0.0'))
+            self.socket.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        if self.record is not None:
+            self.recorder = DatagramRecorder(self.record, self.record_size * 1024 * 1024)
 
     def recieve(self) -> None:
         # check if we are connected
@@ -32,13 +52,42 @@ class DummyReciever():
         
         # listen to socket
         while True:
-            message, _ = self.socket.recvfrom(1024)
-            log.debug(message)
-            action = Action.decode(message)
+            message, addr = self.socket.recvfrom(MAX_DATAGRAM_SIZE)
+            recv_ns = time.monotonic_ns()
+            if self.recorder is not None:
+                self.recorder.append(message, addr, recv_ns)
+            # a batch is demuxed to this robot's slot, anything for other robots is dropped
+            try:
+                action = decode_datagram(message, self.robot_id)
+            except (ValueError, IndexError, struct.error) as e:
+                log.warning(f'dropping malformed datagram: {e}')
+                continue
+            if action is None:
+                continue
+            action.recv_ns = recv_ns # also the sequence filter's clock
+            if not self.sequence_filter.accept((addr, action.robot_id), action):
+                continue
+            tracelog.record(RECEIVED, action.robot_id, action.seq, action.vx, action.vy, action.w)
+            tracer.mark('receive', recv_ns)
             # send it to another process for distribution to controllers...
             self.recv.put(action, block=True)
             time.sleep(.05)
 
     @staticmethod
-    def add_cls_specific_arguments(parent: argparse.ArgumentParser) -> None:
-        return parent
\ No newline at end of file
+    def add_cls_specific_arguments(parent: argparse.ArgumentParser) -> argparse.ArgumentParser:
+        '''
+            add_cls_specific_arguments() - adds the following arguments:
+                --robot-id : id of this robot, required to receive action batches
+                --multicast-group : multicast group to join for team-wide action batches
+                --record, --record-size : see DatagramRecorder
+
+            @args
+                parent (argparse.ArgumentParser) - argparse (from run.py)
+
+            @returns
+                parent (argparse.ArgumentParser) 
+        '''
+        parser = parent.add_argument_group('DummyReciever')
+        parser.add_argument('--robot-id', type=int, default=None)
+        parser.add_argument('--multicast-group', type=str, default=None)
+        return DatagramRecorder.add_cls_specific_arguments(parent)
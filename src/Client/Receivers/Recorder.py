@@ -0,0 +1,129 @@
+'''incoming datagrams appended to a preallocated memory mapped log, for replay with replay.py'''
+import argparse
+import mmap
+import os
+import socket
+import struct
+import sys
+import logging
+
+log = logging.getLogger()
+
+# magic, version, bytes used including this header, datagrams recorded
+HEADER_STRUCT = struct.Struct('<4sHxxQQ')
+# time.monotonic_ns() at receive, ipv4 source address, source port, datagram length
+RECORD_STRUCT = struct.Struct('<q4sHH')
+MAGIC = b'RCMD'
+VERSION = 1
+
+class DatagramRecorder:
+    def __init__(self, path: str, size: int=64 * 1024 * 1024) -> None:
+        """
+            appends every datagram read by a receiver to a file that is preallocated and mapped into memory
+            when it is opened. `append()` is two copies into the mapping, no system call and no formatting;
+            the header is rewritten after every datagram, so the log stays readable if the process is killed
+        attributes:
+            path (str): file of the log, truncated to the bytes used by `close()`
+            size (int): bytes preallocated, datagrams that do not fit any more are dropped
+            recorded (int): datagrams written
+            dropped (int): datagrams that did not fit
+        """
+        self.path = path
+        self.size = max(size, HEADER_STRUCT.size)
+        self.recorded: int = 0
+        self.dropped: int = 0
+        self._offset: int = HEADER_STRUCT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(self._fd, 0, self.size) # allocate the blocks now, not on the first write to each page
+        else:
+            os.ftruncate(self._fd, self.size)
+        self._map = mmap.mmap(self._fd, self.size)
+        self._write_header()
+
+    def append(self, data: bytes, addr: tuple[str, int], recv_ns: int) -> None:
+        '''
+            append() - writes one datagram at the end of the log
+
+            @args
+                data (bytes): datagram as read from the socket
+                addr (tuple[str, int]): ipv4 address and port of the sender
+                recv_ns (int): time.monotonic_ns() when the datagram was read
+        '''
+        offset = self._offset
+        end = offset + RECORD_STRUCT.size + len(data)
+        if end > self.size:
+            if not self.dropped:
+                log.warning(f'recorder: {self.path} is full after {self.recorded} datagrams, consider a larger --record-size')
+            self.dropped += 1
+            return
+        RECORD_STRUCT.pack_into(self._map, offset, recv_ns, socket.inet_aton(addr[0]), addr[1], len(data))
+        self._map[offset + RECORD_STRUCT.size:end] = data
+        self._offset = end
+        self.recorded += 1
+        self._write_header()
+
+    def close(self) -> None:
+        '''
+            close() - unmaps the log and gives the unused preallocated space back
+        '''
+        if self._map is None:
+            return
+        self._map.flush()
+        self._map.close()
+        self._map = None
+        os.ftruncate(self._fd, self._offset)
+        os.close(self._fd)
+        log.info(f'recorder: {self.recorded} datagrams in {self.path}, {self.dropped} dropped')
+
+    def _write_header(self) -> None:
+        HEADER_STRUCT.pack_into(self._map, 0, MAGIC, VERSION, self._offset, self.recorded)
+
+    @staticmethod
+    def read(path: str):
+        '''
+            read() - reads a log written by `DatagramRecorder`, also while it is still being written
+
+            @args
+                path (str): file of the log
+
+            @returns
+                generator of tuple[int, tuple[str, int], bytes] - receive time (ns), sender address and datagram,
+                    in the order they were received
+        '''
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, used, count = HEADER_STRUCT.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a datagram log (magic {magic!r}, version {version})')
+        offset = HEADER_STRUCT.size
+        for _ in range(count):
+            recv_ns, address, port, length = RECORD_STRUCT.unpack_from(data, offset)
+            offset += RECORD_STRUCT.size
+            yield recv_ns, (socket.inet_ntoa(address), port), data[offset:offset + length]
+            offset += length
+
+    @staticmethod
+    def add_cls_specific_arguments(parent: argparse.ArgumentParser) -> argparse.ArgumentParser:
+        '''
+            add_cls_specific_arguments() - adds the following arguments:
+                --record : append every incoming datagram to this file, for replay.py
+                --record-size : megabytes preallocated for the recording
+
+            @args
+                parent (argparse.ArgumentParser) - argparse (from run.py)
+
+            @returns
+                parent (argparse.ArgumentParser)
+        '''
+        parser = parent.add_argument_group('DatagramRecorder')
+        parser.add_argument('--record', type=str, default=None, metavar='PATH', help='append every incoming datagram with its receive time and sender to PATH (replay with replay.py)')
+        parser.add_argument('--record-size', type=int, default=64, help='megabytes preallocated for --record, later datagrams are dropped')
+        return parent
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        start = None
+        for recv_ns, addr, data in DatagramRecorder.read(path):
+            start = recv_ns if start is None else start
+            print(f'{(recv_ns - start) / 1e9:.6f} {addr[0]}:{addr[1]} {len(data)} bytes {data[:32].hex()}')
@@ -0,0 +1,101 @@
+'''rejects stale and duplicate actions using their sequence numbers'''
+from Client.Shared.Action import Action, SEQ_MODULO
+from typing import Hashable
+import time
+import logging
+
+log = logging.getLogger()
+
+class SequenceFilter:
+    def __init__(self, restart_window: int=1000, idle_timeout: float=.5) -> None:
+        """
+            keeps the last accepted sequence number of every sender and rejects anything that is not newer.
+            sequence numbers wrap around, so `newer` is decided with serial number arithmetic (RFC 1982).
+            reordering only happens within a burst of datagrams: after `idle_timeout` seconds without an
+            accepted action, a sender that goes back is taken to have restarted, and a sender that does not
+            come back is forgotten, so senders that went away (restarts on a new port, replay.py passes)
+            do not pile up
+        attributes:
+            restart_window (int): an action older than this many sequence numbers means the sender restarted
+            idle_timeout (float): seconds without an accepted action after which a sender's history is dropped
+            accepted (int): actions passed on
+            lost (int): sequence numbers skipped between two accepted actions
+            reordered (int): actions rejected for arriving after a newer action
+            duplicates (int): actions rejected for repeating the last accepted sequence number
+            restarts (int): senders whose sequence numbers jumped back by more than `restart_window`,
+                or jumped back at all after being idle
+            expired (int): senders forgotten after being idle for `idle_timeout`
+        """
+        self.restart_window: int = restart_window
+        self.idle_timeout: float = idle_timeout
+        self._idle_ns: int = int(idle_timeout * 1e9)
+        self._last: dict = dict() # sender -> (last accepted sequence number, its receive time in ns)
+        self._expired_ns: int = 0 # receive time of the last sweep for idle senders
+        self.accepted: int = 0
+        self.lost: int = 0
+        self.reordered: int = 0
+        self.duplicates: int = 0
+        self.restarts: int = 0
+        self.expired: int = 0
+
+    def accept(self, sender: Hashable, action: Action) -> bool:
+        '''
+        accept() - checks `action` against the last action accepted from `sender`
+
+        @args
+            sender (Hashable): identifies the sender, e.g. (address, robot_id)
+            action (Action): received action, its `recv_ns` is the time it was received (0: now)
+
+        @returns
+            bool - True if the action is newer than anything accepted from `sender` so far
+        '''
+        now = action.recv_ns or time.monotonic_ns()
+        seq = action.seq
+        if seq == 0: # the sender does not number its actions
+            self.accepted += 1
+            return True
+
+        last, last_ns = self._last.get(sender, (None, None))
+        if last is not None:
+            distance = (seq - last) % SEQ_MODULO
+            if distance < SEQ_MODULO // 2 and distance != 0:
+                self.lost += distance - 1
+            elif now - last_ns > self._idle_ns or distance != 0 and SEQ_MODULO - distance > self.restart_window:
+                log.warning(f'{sender} restarted its sequence numbers at {seq} (last {last})')
+                self.restarts += 1
+            elif distance == 0:
+                self.duplicates += 1
+                return False
+            else:
+                self.reordered += 1
+                return False
+
+        self._last[sender] = (seq, now)
+        self.accepted += 1
+        if now - self._expired_ns > self._idle_ns:
+            self._expire(now)
+        return True
+
+    def _expire(self, now: int) -> None:
+        # forget the senders that were idle for `idle_timeout`, at most once every `idle_timeout`
+        idle = [sender for sender, (_, last_ns) in self._last.items() if now - last_ns > self._idle_ns]
+        for sender in idle:
+            del self._last[sender]
+        self.expired += len(idle)
+        self._expired_ns = now
+
+    def stats(self) -> dict:
+        '''
+        stats() - snapshot of the filter counters
+
+        @returns
+            dict - accepted, lost, reordered, duplicate, restart and expired sender counts
+        '''
+        return {
+            'accepted': self.accepted,
+            'lost': self.lost,
+            'reordered': self.reordered,
+            'duplicates': self.duplicates,
+            'restarts': self.restarts,
+            'expired': self.expired,
+        }
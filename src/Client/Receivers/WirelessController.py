@@ -1,7 +1,6 @@
 import logging
 
 log = logging.getLogger()
-log.setLevel(logging.NOTSET)
 
 class WirelessController:
     def __init__(self): ...
@@ -0,0 +1,6 @@
+'''receivers run.py can read actions with, imported only when they are selected'''
+from Client.Registry import Registry
+
+receivers = Registry('receiver')
+receivers.register('async', 'Client.Receivers.Async', 'AsyncReciever', description='asyncio, hands on the newest action as soon as it is read')
+receivers.register('dummy', 'Client.Receivers.Dummy', 'DummyReciever', description='blocking socket, one action every 50ms')
@@ -0,0 +1,121 @@
+'''registries of controllers and receivers by name, imported only when they are used'''
+import importlib
+import os
+import subprocess
+import sys
+import time
+import logging
+
+log = logging.getLogger()
+
+class Plugin:
+    def __init__(self, name: str, module: str, cls: str, factory: str=None, description: str='') -> None:
+        """
+            a class (and the factory starting it in a process) known by module and attribute name
+        attributes:
+            name (str): name used on the command line
+            module (str): module defining the class, not imported until `load()`
+            description (str): one line shown by `--list-controllers`
+            import_time (float): seconds the first `load()` took in this process, None until then
+        """
+        self.name = name
+        self.module = module
+        self._cls = cls
+        self._factory = factory
+        self.description = description
+        self.import_time: float = None
+
+    def load(self):
+        '''
+            load() - imports `module`, timing the first import
+
+            @returns
+                module - the imported module
+        '''
+        if self.import_time is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self.module)
+            self.import_time = time.perf_counter() - start
+            return module
+        return importlib.import_module(self.module)
+
+    def fresh_import_time(self) -> float:
+        '''
+            fresh_import_time() - time `module` takes to import in a new interpreter, with nothing imported yet
+
+            @returns
+                float - seconds, including every module `module` imports
+        '''
+        env = {**os.environ, 'PYTHONPATH': os.pathsep.join(path for path in sys.path if path)}
+        modules = profile_startup(['-c', f'import {self.module}'], top=None, env=env)
+        return next(cumulative for name, _, cumulative in modules if name == self.module) / 1e6
+
+    @property
+    def cls(self) -> type:
+        return getattr(self.load(), self._cls)
+
+    @property
+    def factory(self):
+        if self._factory is None:
+            raise RuntimeError(f'{self.name} has no factory')
+        return getattr(self.load(), self._factory)
+
+    @property
+    def loaded(self) -> bool:
+        return self.module in sys.modules
+
+
+class Registry:
+    def __init__(self, kind: str) -> None:
+        """
+            `Plugin`s by name
+        Args:
+            kind (str): what the plugins are, for error messages
+        """
+        self.kind = kind
+        self._plugins: dict[str, Plugin] = dict()
+
+    def register(self, name: str, module: str, cls: str, factory: str=None, description: str='') -> Plugin:
+        '''
+            register() - adds a plugin without importing its module
+        '''
+        if name in self._plugins:
+            raise ValueError(f'{self.kind} {name!r} is already registered')
+        plugin = self._plugins[name] = Plugin(name, module, cls, factory, description)
+        return plugin
+
+    def __getitem__(self, name: str) -> Plugin:
+        try:
+            return self._plugins[name]
+        except KeyError:
+            raise ValueError(f'unknown {self.kind} {name!r}, expected one of {", ".join(self._plugins)}') from None
+
+    def __iter__(self):
+        return iter(self._plugins.values())
+
+    def names(self) -> tuple[str, ...]:
+        return tuple(self._plugins)
+
+
+def profile_startup(argv: list[str], top: int=20, env: dict=None) -> list[tuple[str, int, int]]:
+    '''
+        profile_startup() - runs `argv` in a new interpreter with `-X importtime`
+
+        @args
+            argv (list[str]): script and arguments, e.g. ['run.py', '--list-controllers']
+            top (int): number of modules to return, None returns all of them
+            env (dict): environment of the new interpreter, None inherits this one
+
+        @returns
+            list[tuple[str, int, int]] - module, self and cumulative import time (us) of the slowest
+                modules by cumulative time
+    '''
+    result = subprocess.run([sys.executable, '-X', 'importtime', *argv], capture_output=True, text=True, env=env)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own), int(cumulative)))
+    modules.sort(key=lambda module: module[2], reverse=True)
+    return modules[:top]
@@ -0,0 +1,107 @@
+'''single process runtime: receiver, command state and controllers as tasks of one event loop'''
+from Client import SharedResource
+from Client.Shared.Action import Action
+from Client.Controllers import controllers
+from Client.Publisher import TelemetryPublisher
+from typing import TYPE_CHECKING
+import argparse
+import asyncio
+import logging
+
+if TYPE_CHECKING:
+    from Client.Receivers.Async import AsyncReciever
+
+log = logging.getLogger()
+
+class SingleProcessRuntime:
+    def __init__(self, receiver: 'AsyncReciever', shared_global_resource: SharedResource=None) -> None:
+        """
+            runs the receiver and the controllers as tasks of one asyncio event loop instead of one process each.
+            actions are handed from the receiver to the controllers by reference through a plain `SharedResource`:
+            no queue, no dispatcher process and no pickling or shared memory copies on the way
+        attributes:
+            receiver (AsyncReciever): connected receiver, serves the UDP socket
+            shared_global_resource (SharedResource): command state shared by the tasks
+            action_event (asyncio.Event): set whenever a new action is published
+            motor (MotorController2): runs the CAN cycle, None when disabled
+            arduino (ArduinoController): writes kicker and dribbler commands, None when disabled
+            publisher (TelemetryPublisher): status uplink, None when disabled
+            received (int): actions published
+        """
+        self.receiver = receiver
+        self.shared_global_resource = shared_global_resource if shared_global_resource is not None else SharedResource()
+        self.action_event: asyncio.Event = None # created inside the running loop
+        self.motor = None
+        self.arduino = None
+        self.publisher = None
+        self.received: int = 0
+
+    def on_action(self, action: Action) -> None:
+        '''
+            on_action() - publishes the newest `action` from the receiver and wakes up the arduino task
+        '''
+        self.shared_global_resource.set_action(action)
+        self.received += 1
+        self.action_event.set()
+
+    async def run(self) -> None:
+        '''
+            run() - runs every task until one of them fails or the runtime is cancelled, then stops the robot
+        '''
+        self.action_event = asyncio.Event()
+        tasks = [asyncio.create_task(self.receiver.serve(self.on_action), name='receiver')]
+        if self.motor is not None:
+            tasks.append(asyncio.create_task(self.motor.run(), name='motor'))
+        if self.arduino is not None:
+            tasks.append(asyncio.create_task(self.arduino.serve(self.action_event), name='arduino'))
+        if self.publisher is not None:
+            tasks.append(asyncio.create_task(self.publisher.serve(self.shared_global_resource), name='telemetry'))
+        log.info(f'single process runtime with tasks: {", ".join(task.get_name() for task in tasks)}')
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result() # a task only returns by raising, re-raise it here
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True) # the motor task stops the motors when cancelled
+            log.info(f'runtime: {self.stats()}')
+
+    def stats(self) -> dict:
+        '''
+            stats() - counters of the receiver side
+        '''
+        return {'received': self.received}
+
+    @staticmethod
+    def from_args(args: argparse.Namespace) -> 'SingleProcessRuntime':
+        '''
+            from_args() - builds the runtime and its enabled controllers from run.py's arguments
+        '''
+        from Client.Receivers.Async import AsyncReciever # imported once --single-process is chosen, like the controllers
+        receiver = AsyncReciever(robot_id=args.robot_id, multicast_group=args.multicast_group, record=args.record, record_size=args.record_size)
+        receiver.connect()
+        runtime = SingleProcessRuntime(receiver)
+        if not args.disable_motor_controller:
+            runtime.motor = controllers['motor'].factory.make(runtime.shared_global_resource, args)
+        if not args.disable_arduino_controller:
+            runtime.arduino = controllers['arduino'].factory.make(runtime.shared_global_resource, args)
+        if args.telemetry_host is not None:
+            runtime.publisher = TelemetryPublisher(args.telemetry_host, args.telemetry_port, args.telemetry_rate, args.robot_id)
+        return runtime
+
+    @staticmethod
+    def add_cls_specific_arguments(parent: argparse.ArgumentParser) -> argparse.ArgumentParser:
+        '''
+            add_cls_specific_arguments() - adds the following arguments:
+                --single-process : run the receiver and controllers in one event loop instead of one process each
+
+            @args
+                parent (argparse.ArgumentParser) - argparse (from run.py)
+
+            @returns
+                parent (argparse.ArgumentParser)
+        '''
+        parser = parent.add_argument_group('SingleProcessRuntime')
+        parser.add_argument('--single-process', action='store_true', help='run the receiver and controllers as tasks of one event loop (only with --receiver async)')
+        return parent
@@ -1,9 +1,48 @@
 import time
+import struct
 from abc import ABC,abstractmethod
 import logging
 
 log = logging.getLogger()
 
+# binary wire format
+#   magic (uint8), version (uint8), robot_id (uint8), flags (uint8),
+#   seq (uint32), vx, vy, w (float32), time (float64)
+# the magic byte can never start a text encoded action (which always starts with a digit)
+ACTION_MAGIC: int = 0xA5
+ACTION_VERSION: int = 2
+ACTION_STRUCT: struct.Struct = struct.Struct('<BBBBIfffd')
+# version 1 has no sequence number
+ACTION_STRUCT_V1: struct.Struct = struct.Struct('<BBBBfffd')
+# sequence numbers are uint32 and wrap around, 0 means the sender does not number its actions
+SEQ_MODULO: int = 1 << 32
+
+# bits of the binary `flags` byte
+FLAG_KICK: int = 0x01
+FLAG_DRIBBLE: int = 0x02
+
+# batch wire format (one datagram carrying actions for several robots)
+#   magic (uint8), version (uint8), count (uint8),
+#   `count` index entries of robot_id (uint8), offset (uint16),
+#   `count` binary encoded actions, each starting at its indexed offset
+BATCH_MAGIC: int = 0xA6
+BATCH_VERSION: int = 1
+BATCH_HEADER_STRUCT: struct.Struct = struct.Struct('<BBB')
+BATCH_INDEX_STRUCT: struct.Struct = struct.Struct('<BH')
+
+# a `Trajectory` (see Trajectory.py) for one robot. its sizes are defined here, so shared memory
+# can be laid out without importing Trajectory.py and numpy
+TRAJECTORY_MAGIC: int = 0xA7
+TRAJECTORY_STRUCT: struct.Struct = struct.Struct('<BBBBIBd')
+WAYPOINT_SIZE: int = struct.calcsize('<4f')
+MAX_WAYPOINTS: int = 32
+TRAJECTORY_MAX_SIZE: int = TRAJECTORY_STRUCT.size + MAX_WAYPOINTS * WAYPOINT_SIZE
+
+# longest datagram a receiver has to read in one piece: a batch for 255 robots (7908 bytes).
+# text actions are far shorter, 1024 is what the receivers read before batches existed
+BATCH_MAX_SIZE: int = BATCH_HEADER_STRUCT.size + 0xFF * (BATCH_INDEX_STRUCT.size + ACTION_STRUCT.size)
+MAX_DATAGRAM_SIZE: int = max(BATCH_MAX_SIZE, TRAJECTORY_MAX_SIZE, 1024)
+
 class BaseAction(ABC):
     def __init__(self) -> None:
         super().__init__()
@@ -17,7 +56,7 @@ class BaseAction(ABC):
         ... 
     
 class Action(BaseAction):
-    def __init__(self, robot_id:int, vx: float = 0.0, vy: float = 0.0, w: float = 0.0, kick: int = 0, dribble: bool = False):
+    def __init__(self, robot_id:int, vx: float = 0.0, vy: float = 0.0, w: float = 0.0, kick: int = 0, dribble: bool = False, seq: int = 0):
         """Action
             Object for initialise action commands, encode / decode strings for UDP transportation.
         Args:
@@ -27,9 +66,11 @@ class Action(BaseAction):
             w (float): wanted angular velocity (radians)
             kick (int): wanted kicker to kick (0/1)
             dribble (int): wanted kicker to dribble (0/1)
+            seq (int): per-sender sequence number, increases by one for every action sent (0: not numbered)
             
         Params:
             time(time.time): time of packet generated
+            recv_ns(int): time.monotonic_ns() when the packet was received, 0 if not received. never sent
         """
         self._time: float = time.time()
         self._robot_id: int = robot_id
@@ -38,6 +79,8 @@ class Action(BaseAction):
         self._w: float = w
         self._kick: int = kick
         self._dribble: int = dribble
+        self._seq: int = seq
+        self._recv_ns: int = 0
     
     def id(self) -> int:
         """Gets the robotID of action
@@ -47,21 +90,69 @@ class Action(BaseAction):
         """
         return self.robot_id
     
-    def encode(self) -> bytes:
+    def encode(self, binary: bool = False) -> bytes:
         """encode
             Encodes action object into bytes
+        Args:
+            binary (bool): use the fixed-width binary format instead of the text format
             
         Returns:
             bytes: byte data for sending
         """
-        self.msg = f"{self._robot_id} {self._vx} {self._vy} {self._w} {self._kick} {self._dribble} {self._time}"
+        if binary:
+            self.msg = bytearray(ACTION_STRUCT.size)
+            self.pack_into(self.msg)
+            self.msg = bytes(self.msg)
+            return self.msg
+        self.msg = f"{self._robot_id} {self._vx} {self._vy} {self._w} {int(self._kick)} {int(self._dribble)} {self._time} {self._seq}"
         self.msg = bytes(self.msg.encode('utf-8'))
         return self.msg
-    
+
+    def pack_into(self, buffer, offset: int = 0) -> int:
+        """pack_into
+            Writes the binary format of the action into `buffer` at `offset`
+        Args:
+            buffer (bytearray | memoryview): writable buffer of at least `ACTION_STRUCT.size` bytes
+            offset (int): position in `buffer` to write to
+
+        Returns:
+            int: number of bytes written
+        """
+        flags = (FLAG_KICK if self._kick else 0) | (FLAG_DRIBBLE if self._dribble else 0)
+        ACTION_STRUCT.pack_into(buffer, offset, ACTION_MAGIC, ACTION_VERSION, self._robot_id, flags, self._seq, self._vx, self._vy, self._w, self._time)
+        return ACTION_STRUCT.size
+
+    @classmethod
+    def unpack_from(cls, buffer, offset: int = 0) -> object:
+        """unpack_from
+            Reads a binary encoded action from `buffer` at `offset`
+        Args:
+            buffer (bytes | bytearray | memoryview): buffer holding a binary encoded action
+            offset (int): position of the action in `buffer`
+
+        Raises:
+            ValueError: the magic byte or version does not match
+
+        Returns:
+            object: Action object for robot to access
+        """
+        magic, version = buffer[offset], buffer[offset + 1]
+        if magic != ACTION_MAGIC or version not in (1, ACTION_VERSION):
+            raise ValueError(f'unsupported binary action: magic={magic:#x}, version={version}')
+        if version == ACTION_VERSION:
+            _, _, robot_id, flags, seq, vx, vy, w, _time = ACTION_STRUCT.unpack_from(buffer, offset)
+        else:
+            _, _, robot_id, flags, vx, vy, w, _time = ACTION_STRUCT_V1.unpack_from(buffer, offset)
+            seq = 0
+        action = Action(robot_id, vx, vy, w, flags & FLAG_KICK, (flags & FLAG_DRIBBLE) >> 1, seq)
+        action._time = _time
+        return action
+
     @classmethod
     def decode(cls,action_string:str) -> object:
         """decode
-            decode and stores the action to an object
+            decode and stores the action to an object. the binary format is detected by its magic byte,
+            anything else is treated as the text format
         Args:
             action (bytes): message received upon UDP
             
@@ -71,14 +162,18 @@ class Action(BaseAction):
         Returns:
             object: Action object for robot to access
         """
-        if isinstance(action_string, bytes):
-            action_string = action_string.decode()
+        if isinstance(action_string, (bytes, bytearray, memoryview)):
+            if action_string[0] == ACTION_MAGIC:
+                return cls.unpack_from(action_string)
+            action_string = bytes(action_string).decode()
 
-        robot_id, vx, vy, w, kick, dribble, _time = action_string.split(" ")
+        robot_id, vx, vy, w, kick, dribble, _time, *seq = action_string.split(" ") # older senders do not send `seq`
         
-        args = [int(robot_id), float(vx),float(vy),float(w),int(kick),int(dribble)]
+        args = [int(robot_id), float(vx),float(vy),float(w),int(kick),int(dribble),int(seq[0]) if seq else 0]
         
-        return Action(*args) 
+        action = Action(*args)
+        action._time = float(_time) # keep the sender's timestamp
+        return action
 
     def __repr__(self) -> str:
         """ this is a representation statement
@@ -86,7 +181,7 @@ class Action(BaseAction):
         Returns:
             str: representation string
         """ 
-        return f"Action: (id: {self._robot_id} vx: {self._vx}, vy: {self._vy}, theta: {self._w}, kick: {self._kick}, dribble: {self._dribble}), time: {self._time}"
+        return f"Action: (id: {self._robot_id} vx: {self._vx}, vy: {self._vy}, theta: {self._w}, kick: {self._kick}, dribble: {self._dribble}), time: {self._time}, seq: {self._seq}"
     
     @property
     def robot_id(self):
@@ -98,6 +193,31 @@ class Action(BaseAction):
             raise ValueError
         self._robot_id = robot_id
 
+    @property
+    def duration(self) -> float:
+        # seconds of motion the command describes after it was received, an action is a single twist
+        return 0.
+
+    @property
+    def recv_ns(self):
+        return self._recv_ns
+
+    @recv_ns.setter
+    def recv_ns(self, recv_ns: int):
+        if not isinstance(recv_ns, int):
+            raise ValueError
+        self._recv_ns = recv_ns
+
+    @property
+    def seq(self):
+        return self._seq
+
+    @seq.setter
+    def seq(self, seq: int):
+        if not isinstance(seq, int):
+            raise ValueError
+        self._seq = seq % SEQ_MODULO
+
     @property
     def w(self):
         return self._w
@@ -149,4 +269,95 @@ class Action(BaseAction):
             raise ValueError
         self._dribble = dribble
 
-    
+
+class ActionBatch(BaseAction):
+    def __init__(self, actions: list[Action]) -> None:
+        """ActionBatch
+            Actions for several robots, sent as a single datagram so one send
+            (unicast, broadcast or multicast) drives the whole team
+        Args:
+            actions (list[Action]): one action per robot
+        """
+        if len(actions) > 0xFF:
+            raise ValueError(f'a batch holds at most 255 actions, got {len(actions)}')
+        self.actions: list[Action] = actions
+
+    def encode(self) -> bytes:
+        """encode
+            Encodes the batch into bytes: header, offset index, binary actions
+
+        Returns:
+            bytes: byte data for sending
+        """
+        count = len(self.actions)
+        start = BATCH_HEADER_STRUCT.size + count * BATCH_INDEX_STRUCT.size
+        msg = bytearray(start + count * ACTION_STRUCT.size)
+        BATCH_HEADER_STRUCT.pack_into(msg, 0, BATCH_MAGIC, BATCH_VERSION, count)
+        for i, action in enumerate(self.actions):
+            offset = start + i * ACTION_STRUCT.size
+            BATCH_INDEX_STRUCT.pack_into(msg, BATCH_HEADER_STRUCT.size + i * BATCH_INDEX_STRUCT.size, action.robot_id, offset)
+            action.pack_into(msg, offset)
+        return bytes(msg)
+
+    @classmethod
+    def decode(cls, data: bytes) -> object:
+        """decode
+            Decodes every action in the batch
+        Args:
+            data (bytes): message received upon UDP
+
+        Returns:
+            object: ActionBatch object
+        """
+        return ActionBatch([Action.unpack_from(data, offset) for _, offset in cls._index(data)])
+
+    @classmethod
+    def extract(cls, data: bytes, robot_id: int) -> Action | None:
+        """extract
+            Decodes only the action addressed to `robot_id` by looking it up in the offset index
+        Args:
+            data (bytes): message received upon UDP
+            robot_id (int): robot to extract the action for
+
+        Returns:
+            Action | None: action for `robot_id`, None if the batch has no slot for it
+        """
+        for slot_id, offset in cls._index(data):
+            if slot_id == robot_id:
+                return Action.unpack_from(data, offset)
+        return None
+
+    @staticmethod
+    def _index(data: bytes):
+        magic, version, count = BATCH_HEADER_STRUCT.unpack_from(data, 0)
+        if magic != BATCH_MAGIC or version != BATCH_VERSION:
+            raise ValueError(f'unsupported action batch: magic={magic:#x}, version={version}')
+        return BATCH_INDEX_STRUCT.iter_unpack(data[BATCH_HEADER_STRUCT.size:BATCH_HEADER_STRUCT.size + count * BATCH_INDEX_STRUCT.size])
+
+    def __repr__(self) -> str:
+        return f"ActionBatch: {self.actions}"
+
+
+def decode_datagram(data: bytes, robot_id: int | None = None) -> Action | None:
+    """decode_datagram
+        Decodes a datagram holding a text action, a binary action, an action batch or a trajectory
+    Args:
+        data (bytes): message received upon UDP
+        robot_id (int | None): only return the action addressed to this robot. None accepts any single
+            action; a batch always needs a `robot_id`
+
+    Returns:
+        Action | None: the action for this robot, None if the datagram has nothing for it
+    """
+    if data[0] == BATCH_MAGIC:
+        if robot_id is None:
+            raise ValueError('a robot_id is required to extract an action from a batch')
+        return ActionBatch.extract(data, robot_id)
+    if data[0] == TRAJECTORY_MAGIC:
+        from Client.Shared.Trajectory import Trajectory # Trajectory.py imports this module
+        action = Trajectory.decode(data)
+    else:
+        action = Action.decode(data)
+    if robot_id is not None and action.robot_id != robot_id:
+        return None
+    return action
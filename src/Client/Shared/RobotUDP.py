@@ -317,7 +317,7 @@ class Sender(Coms):
                 debug_print(se)    
             
             finally:
-                debug_print(f"message {msg.decode()} is sent to destination {self.destination}: {sent}")
+                debug_print(f"message {msg!r} is sent to destination {self.destination}: {sent}")
                 
                 if endTime - time.time() <= 0:
                     debug_print("Duration ended")
@@ -0,0 +1,142 @@
+import functools
+import struct
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# binary wire format of the robot -> team controller status frame
+#   magic (uint8), version (uint8), robot_id (uint8), flags (uint8),
+#   seq (uint32), time (float64), voltage, current (float32),
+#   wheel velocities (4 x float32, rev/s), wheel fault codes (4 x uint8),
+#   command_seq (uint32): sequence number of the last command the robot received
+# 0xA5 - 0xA7 are the team controller -> robot messages in Action.py
+TELEMETRY_MAGIC: int = 0xA8
+TELEMETRY_VERSION: int = 1
+TELEMETRY_STRUCT: struct.Struct = struct.Struct('<BBBBIdff4f4BI')
+# the same layout as a numpy record, for decoding the frames of many robots at once. only the team
+# controller decodes frames, so numpy is imported when `TELEMETRY_DTYPE` is first used, not by the robot
+@functools.cache
+def telemetry_dtype() -> 'np.dtype':
+    import numpy as np
+    dtype = np.dtype([
+        ('magic', 'u1'),
+        ('version', 'u1'),
+        ('robot_id', 'u1'),
+        ('flags', 'u1'),
+        ('seq', '<u4'),
+        ('time', '<f8'),
+        ('voltage', '<f4'),
+        ('current', '<f4'),
+        ('wheel_velocity', '<f4', (4,)),
+        ('wheel_fault', 'u1', (4,)),
+        ('command_seq', '<u4'),
+    ])
+    assert dtype.itemsize == TELEMETRY_STRUCT.size
+    return dtype
+
+def __getattr__(name: str):
+    if name == 'TELEMETRY_DTYPE':
+        return telemetry_dtype()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+# bits of the `flags` byte
+TELEMETRY_FLAG_BALL: int = 0x01 # the ball sensor sees the ball
+TELEMETRY_FLAG_FAULT: int = 0x02 # at least one wheel reports a fault
+
+class Telemetry:
+    def __init__(self, robot_id: int, seq: int = 0, voltage: float = float('nan'), current: float = float('nan'),
+                 wheel_velocity: tuple = (0., 0., 0., 0.), wheel_fault: tuple = (0, 0, 0, 0), ball: bool = False, command_seq: int = 0):
+        """Telemetry
+            Status frame the robot sends to the team controller
+        Args:
+            robot_id (int): sending robot
+            seq (int): frame counter of the sender
+            voltage (float): battery voltage, nan if unknown
+            current (float): battery current, nan if unknown
+            wheel_velocity (tuple[float, ...]): velocity of wheels 1-4 (rev/s)
+            wheel_fault (tuple[int, ...]): moteus fault code of wheels 1-4, 0 when healthy
+            ball (bool): the ball sensor sees the ball
+            command_seq (int): sequence number of the last command the robot received
+
+        Params:
+            time(time.time): time the frame was generated
+        """
+        self.time: float = time.time()
+        self.robot_id: int = robot_id
+        self.seq: int = seq
+        self.voltage: float = voltage
+        self.current: float = current
+        self.wheel_velocity: tuple = tuple(wheel_velocity)
+        self.wheel_fault: tuple = tuple(wheel_fault)
+        self.ball: bool = ball
+        self.command_seq: int = command_seq
+
+    def pack_into(self, buffer, offset: int = 0) -> int:
+        """pack_into
+            Writes the frame into `buffer` at `offset`
+
+        Returns:
+            int: number of bytes written
+        """
+        flags = (TELEMETRY_FLAG_BALL if self.ball else 0) | (TELEMETRY_FLAG_FAULT if any(self.wheel_fault) else 0)
+        TELEMETRY_STRUCT.pack_into(buffer, offset, TELEMETRY_MAGIC, TELEMETRY_VERSION, self.robot_id, flags, self.seq, self.time,
+                                   self.voltage, self.current, *self.wheel_velocity, *self.wheel_fault, self.command_seq)
+        return TELEMETRY_STRUCT.size
+
+    def encode(self) -> bytes:
+        """encode
+            Encodes the frame into bytes
+
+        Returns:
+            bytes: byte data for sending
+        """
+        msg = bytearray(TELEMETRY_STRUCT.size)
+        self.pack_into(msg)
+        return bytes(msg)
+
+    @classmethod
+    def decode(cls, data: bytes) -> object:
+        """decode
+            Decodes a single frame
+
+        Raises:
+            ValueError: the magic byte or version does not match
+
+        Returns:
+            object: Telemetry object
+        """
+        magic, version, robot_id, flags, seq, _time, voltage, current, *wheels, command_seq = TELEMETRY_STRUCT.unpack_from(data)
+        if magic != TELEMETRY_MAGIC or version != TELEMETRY_VERSION:
+            raise ValueError(f'unsupported telemetry: magic={magic:#x}, version={version}')
+        telemetry = cls(robot_id, seq, voltage, current, wheels[:4], wheels[4:], bool(flags & TELEMETRY_FLAG_BALL), command_seq)
+        telemetry.time = _time
+        return telemetry
+
+    def __repr__(self) -> str:
+        return f"Telemetry: (id: {self.robot_id}, voltage: {self.voltage}, current: {self.current}, wheels: {self.wheel_velocity}, faults: {self.wheel_fault}, ball: {self.ball}, command_seq: {self.command_seq}), time: {self.time}, seq: {self.seq}"
+
+
+def decode_frames(frames: list[bytes]) -> 'np.ndarray':
+    """decode_frames
+        Decodes the frames of many robots into one record array in a single pass, e.g. every frame received
+        in one team controller tick. fields are those of TELEMETRY_DTYPE, `frames['wheel_velocity']` is (N,4)
+    Args:
+        frames (list[bytes]): telemetry datagrams
+
+    Raises:
+        ValueError: a frame has the wrong size, magic byte or version
+
+    Returns:
+        np.ndarray: (N,) record array of TELEMETRY_DTYPE
+    """
+    import numpy as np
+    dtype = telemetry_dtype()
+    data = b''.join(frames)
+    if len(data) != len(frames) * dtype.itemsize:
+        raise ValueError(f'telemetry frames must be {dtype.itemsize} bytes each')
+    records = np.frombuffer(data, dtype=dtype)
+    if ((records['magic'] != TELEMETRY_MAGIC) | (records['version'] != TELEMETRY_VERSION)).any():
+        raise ValueError('unsupported telemetry frame')
+    return records
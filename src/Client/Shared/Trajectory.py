@@ -0,0 +1,142 @@
+import bisect
+
+import numpy as np
+
+from Client.Shared.Action import Action, FLAG_KICK, FLAG_DRIBBLE, TRAJECTORY_MAGIC
+from Client.Shared.Action import TRAJECTORY_STRUCT, WAYPOINT_SIZE, MAX_WAYPOINTS, TRAJECTORY_MAX_SIZE
+
+# binary wire format
+#   magic (uint8), version (uint8), robot_id (uint8), flags (uint8),
+#   seq (uint32), count (uint8), time (float64),
+#   `count` waypoints of t, vx, vy, w (float32)
+# waypoint times are seconds after the robot received the trajectory
+TRAJECTORY_VERSION: int = 1
+WAYPOINT_DTYPE: np.dtype = np.dtype('<f4')
+
+class Trajectory(Action):
+    def __init__(self, robot_id: int, waypoints, kick: int = 0, dribble: bool = False, seq: int = 0):
+        """Trajectory
+            Short time-parameterised path executed by the robot itself: the body twist is interpolated
+            linearly between waypoints every control tick, so the robot keeps following the path while
+            packets are lost. As an `Action`, vx, vy and w are the twist of the first waypoint
+        Args:
+            robot_id (int) : wanted Robot ID
+            waypoints (array (N,4)): rows of (t, vx, vy, w), t in seconds after the trajectory was
+                received, strictly increasing. 1 <= N <= MAX_WAYPOINTS
+            kick (int): wanted kicker to kick (0/1)
+            dribble (int): wanted kicker to dribble (0/1)
+            seq (int): per-sender sequence number, shared with the sender's actions (0: not numbered)
+
+        Raises:
+            ValueError: the waypoints have the wrong shape or their times do not increase
+        """
+        waypoints = np.array(waypoints, dtype=float, ndmin=2)
+        if waypoints.ndim != 2 or waypoints.shape[1] != 4 or not 1 <= len(waypoints) <= MAX_WAYPOINTS:
+            raise ValueError(f'expected 1 to {MAX_WAYPOINTS} waypoints of (t, vx, vy, w), got shape {waypoints.shape}')
+        if (np.diff(waypoints[:, 0]) <= 0).any():
+            raise ValueError('waypoint times must be strictly increasing')
+        _, vx, vy, w = waypoints[0]
+        super().__init__(robot_id, float(vx), float(vy), float(w), kick, dribble, seq)
+        self._times: np.ndarray = waypoints[:, 0]
+        self._twists: np.ndarray = waypoints[:, 1:]
+        self._time_list: list[float] = self._times.tolist()
+
+    def sample(self, t) -> np.ndarray:
+        """sample
+            Interpolates the twist at `t` seconds after the trajectory was received, holding the first and
+            last waypoint outside of the trajectory
+        Args:
+            t (float | array (M,)): time(s) to sample
+
+        Returns:
+            np.ndarray: (3,) or (M,3) twists of (vx, vy, w)
+        """
+        times, twists = self._times, self._twists
+        if len(times) == 1:
+            return np.broadcast_to(twists[0], np.shape(t) + (3,)).copy()
+        if np.ndim(t) == 0: # once per control tick, a bisect over the waypoint list beats the array calls
+            points = self._time_list
+            t = min(max(t, points[0]), points[-1])
+            i = min(bisect.bisect_right(points, t) - 1, len(points) - 2)
+            return twists[i] + (t - points[i]) / (points[i + 1] - points[i]) * (twists[i + 1] - twists[i])
+        t = np.clip(t, times[0], times[-1])
+        i = np.clip(np.searchsorted(times, t, side='right') - 1, 0, len(times) - 2)
+        fraction = np.asarray((t - times[i]) / (times[i + 1] - times[i]))[..., np.newaxis]
+        return twists[i] + fraction * (twists[i + 1] - twists[i])
+
+    def encode(self, binary: bool = True) -> bytes:
+        """encode
+            Encodes the trajectory into bytes, trajectories only have a binary format
+
+        Returns:
+            bytes: byte data for sending
+        """
+        self.msg = bytearray(self.size)
+        self.pack_into(self.msg)
+        self.msg = bytes(self.msg)
+        return self.msg
+
+    def pack_into(self, buffer, offset: int = 0) -> int:
+        """pack_into
+            Writes the binary format of the trajectory into `buffer` at `offset`
+        Args:
+            buffer (bytearray | memoryview): writable buffer of at least `size` bytes
+            offset (int): position in `buffer` to write to
+
+        Returns:
+            int: number of bytes written
+        """
+        flags = (FLAG_KICK if self._kick else 0) | (FLAG_DRIBBLE if self._dribble else 0)
+        TRAJECTORY_STRUCT.pack_into(buffer, offset, TRAJECTORY_MAGIC, TRAJECTORY_VERSION, self._robot_id, flags, self._seq, len(self._times), self._time)
+        start = offset + TRAJECTORY_STRUCT.size
+        buffer[start:offset + self.size] = np.column_stack((self._times, self._twists)).astype(WAYPOINT_DTYPE).tobytes()
+        return self.size
+
+    @classmethod
+    def unpack_from(cls, buffer, offset: int = 0) -> object:
+        """unpack_from
+            Reads a binary encoded trajectory from `buffer` at `offset`, the waypoints are decoded in one go
+        Args:
+            buffer (bytes | bytearray | memoryview): buffer holding a binary encoded trajectory
+            offset (int): position of the trajectory in `buffer`
+
+        Raises:
+            ValueError: the magic byte or version does not match, or the buffer is too short
+
+        Returns:
+            object: Trajectory object for robot to access
+        """
+        magic, version, robot_id, flags, seq, count, _time = TRAJECTORY_STRUCT.unpack_from(buffer, offset)
+        if magic != TRAJECTORY_MAGIC or version != TRAJECTORY_VERSION:
+            raise ValueError(f'unsupported trajectory: magic={magic:#x}, version={version}')
+        waypoints = np.frombuffer(buffer, dtype=WAYPOINT_DTYPE, count=4 * count, offset=offset + TRAJECTORY_STRUCT.size)
+        trajectory = cls(robot_id, waypoints.reshape(count, 4), flags & FLAG_KICK, (flags & FLAG_DRIBBLE) >> 1, seq)
+        trajectory._time = _time
+        return trajectory
+
+    @classmethod
+    def decode(cls, data: bytes) -> object:
+        """decode
+            Decodes a binary encoded trajectory
+        Args:
+            data (bytes): message received upon UDP
+
+        Returns:
+            object: Trajectory object for robot to access
+        """
+        return cls.unpack_from(data)
+
+    def __repr__(self) -> str:
+        return f"Trajectory: (id: {self._robot_id}, waypoints: {len(self._times)}, duration: {self.duration}, kick: {self._kick}, dribble: {self._dribble}), time: {self._time}, seq: {self._seq}"
+
+    @property
+    def size(self) -> int:
+        return TRAJECTORY_STRUCT.size + len(self._times) * WAYPOINT_SIZE
+
+    @property
+    def duration(self) -> float:
+        return float(self._times[-1])
+
+    @property
+    def waypoints(self) -> np.ndarray:
+        return np.column_stack((self._times, self._twists))
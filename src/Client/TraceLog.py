@@ -0,0 +1,232 @@
+'''binary event records in a preallocated ring buffer, formatted and written off the hot path'''
+import argparse
+import json
+import multiprocessing.util
+import os
+import struct
+import sys
+import threading
+import time
+import logging
+
+log = logging.getLogger()
+
+# time.monotonic_ns(), event id, one integer and four float arguments. the integer is 64 bit, so
+# unsigned 32 bit values such as sequence numbers fit
+RECORD_STRUCT = struct.Struct('<qH6xq4d')
+
+class TraceLog:
+    def __init__(self, capacity: int=4096) -> None:
+        """
+            per-process ring of fixed size binary records. `record()` only packs its arguments into the
+            preallocated buffer; a background writer thread formats them into the log, or copies them
+            unformatted to a file, every `interval` seconds. with a single writing thread per process,
+            no lock is taken on the hot path
+        attributes:
+            enabled (bool): `record()` is a no-op while False
+            capacity (int): records held before the oldest are overwritten
+            written (int): records handed to the sink
+            dropped (int): records overwritten before the writer got to them
+            path (str): file prefix of the binary sink, None formats the records into the log
+            interval (float): seconds between two flushes of the writer
+        """
+        self.enabled: bool = False
+        self.capacity: int = capacity
+        self.written: int = 0
+        self.dropped: int = 0
+        self.path: str = None
+        self.interval: float = .1
+        self._buffer = bytearray(RECORD_STRUCT.size * capacity)
+        self._pack_into = RECORD_STRUCT.pack_into
+        self._head: int = 0 # records recorded
+        self._tail: int = 0 # records flushed
+        self._events: list[tuple[str, str]] = [] # name and format per event id
+        self._file = None
+        self._events_written: int = 0
+        self._writer: threading.Thread = None
+        self._stop = threading.Event()
+
+    def event(self, name: str, format: str) -> int:
+        '''
+            event() - registers an event, usually once at import time
+
+            @args
+                name (str): short name of the event
+                format (str): `str.format()` string of the record, {0} is the integer and {1}-{4} the float arguments
+
+            @returns
+                int - event id passed to `record()`
+        '''
+        self._events.append((name, format))
+        return len(self._events) - 1
+
+    def record(self, event: int, i: int=0, a: float=0., b: float=0., c: float=0., d: float=0.) -> None:
+        '''
+            record() - writes one record into the ring, formatting is left to the writer thread
+        '''
+        if not self.enabled:
+            return
+        head = self._head
+        self._pack_into(self._buffer, head % self.capacity * RECORD_STRUCT.size, time.monotonic_ns(), event, i, a, b, c, d)
+        self._head = head + 1
+
+    def drain(self) -> bytes:
+        '''
+            drain() - takes the records recorded since the last drain, oldest first
+
+            @returns
+                bytes - whole records in the `RECORD_STRUCT` layout
+        '''
+        head, tail = self._head, self._tail
+        if head - tail > self.capacity:
+            self.dropped += head - tail - self.capacity
+            tail = head - self.capacity
+        start, end = tail % self.capacity * RECORD_STRUCT.size, head % self.capacity * RECORD_STRUCT.size
+        if head == tail:
+            data = b''
+        elif start < end:
+            data = bytes(self._buffer[start:end])
+        else: # wrapped around the end of the buffer
+            data = bytes(self._buffer[start:]) + bytes(self._buffer[:end])
+        overwritten = self._head - tail - self.capacity # records the hot path overwrote while copying
+        if overwritten > 0:
+            self.dropped += overwritten
+            data = data[overwritten * RECORD_STRUCT.size:]
+        self._tail = head
+        return data
+
+    def format(self, record: tuple) -> str:
+        '''
+            format() - one line for an unpacked record
+        '''
+        t, event, i, *values = record
+        name, format = self._events[event]
+        return f'{t / 1e9:.6f} {name} {format.format(i, *values)}'
+
+    def flush(self) -> None:
+        '''
+            flush() - hands the new records to the sink
+        '''
+        data = self.drain()
+        if self._file is not None:
+            if self._events_written != len(self._events): # events of modules imported since the last flush
+                with open(f'{self._file.name}.events', 'w') as f:
+                    json.dump(self._events, f)
+                self._events_written = len(self._events)
+            self._file.write(data)
+            self._file.flush()
+        else:
+            for record in RECORD_STRUCT.iter_unpack(data):
+                log.info(f'trace {self.format(record)}')
+        self.written += len(data) // RECORD_STRUCT.size
+
+    def enable(self, path: str=None, interval: float=.1, capacity: int=None) -> None:
+        '''
+            enable() - starts recording and the writer thread, in this process and every process forked from it
+
+            @args
+                path (str): write the binary records to `<path>.<pid>` instead of the log
+                interval (float): seconds between two flushes
+                capacity (int): records held before the oldest are overwritten, None keeps the current capacity
+        '''
+        if capacity is not None and capacity != self.capacity:
+            self.capacity = capacity
+            self._buffer = bytearray(RECORD_STRUCT.size * capacity)
+        self.path = path
+        self.interval = interval
+        self.enabled = True
+        self._start()
+
+    def close(self) -> None:
+        '''
+            close() - stops the writer thread after a last flush
+        '''
+        if self._writer is None:
+            return
+        self._stop.set()
+        self._writer.join()
+        self._writer = None
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.dropped:
+            log.warning(f'trace: {self.dropped} records dropped, consider a larger --trace-capacity')
+
+    def _start(self) -> None:
+        self._stop.clear()
+        if self.path is not None:
+            self._file = open(f'{self.path}.{os.getpid()}', 'wb')
+            self._events_written = 0
+        self._writer = threading.Thread(target=self._write, name='trace writer', daemon=True)
+        self._writer.start()
+        self._register_finalizer()
+
+    def _register_finalizer(self) -> None:
+        # the last flush, also when a multiprocessing.Process exits
+        if self._writer is not None:
+            multiprocessing.util.Finalize(None, self.close, exitpriority=0)
+
+    def _write(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def _after_fork(self) -> None:
+        # the writer thread and the parent's records stay behind in the parent
+        self._head = self._tail = self.written = self.dropped = 0
+        self._writer = None
+        self._file = None
+        self._stop = threading.Event()
+        if self.enabled:
+            self._start()
+
+    @staticmethod
+    def decode(path: str):
+        '''
+            decode() - reads a file written by the binary sink
+
+            @args
+                path (str): `<path>.<pid>` file, its event table is read from `<path>.<pid>.events`
+
+            @returns
+                generator of str - one formatted line per record
+        '''
+        reader = TraceLog()
+        with open(f'{path}.events') as f:
+            reader._events = [tuple(event) for event in json.load(f)]
+        with open(path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % RECORD_STRUCT.size # the last record may be incomplete
+        for record in RECORD_STRUCT.iter_unpack(data[:usable]):
+            yield reader.format(record)
+
+    @staticmethod
+    def add_cls_specific_arguments(parent: argparse.ArgumentParser) -> argparse.ArgumentParser:
+        '''
+            add_cls_specific_arguments() - adds the following arguments:
+                --trace-log : record hot path events, formatted into the log, or written in binary to PATH.<pid>
+                --trace-capacity : records held per process before the oldest are dropped
+
+            @args
+                parent (argparse.ArgumentParser) - argparse (from run.py)
+
+            @returns
+                parent (argparse.ArgumentParser)
+        '''
+        parser = parent.add_argument_group('TraceLog')
+        parser.add_argument('--trace-log', nargs='?', const='', default=None, metavar='PATH', help='record hot path events into the log, or in binary to PATH.<pid> (decode with python -m Client.TraceLog)')
+        parser.add_argument('--trace-capacity', type=int, default=4096, help='trace records held per process')
+        return parent
+
+# event records of this process, enabled by `run.py --trace-log`
+tracelog = TraceLog()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=tracelog._after_fork)
+# a multiprocessing.Process clears the finalizers registered by _after_fork() before it runs its target,
+# register the last flush again once it has
+multiprocessing.util.register_after_fork(tracelog, TraceLog._register_finalizer)
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        for line in TraceLog.decode(path):
+            print(line)
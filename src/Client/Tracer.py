@@ -0,0 +1,141 @@
+'''low overhead latency tracepoints along the command pipeline'''
+import multiprocessing
+import os
+import signal
+import time
+import logging
+
+log = logging.getLogger()
+
+class LatencyHistogram:
+    # values are bucketed by their top 4 bits: 8 buckets per power of two, i.e. within 12.5%
+    SUB_BITS: int = 3
+    BUCKETS: int = (64 - SUB_BITS + 1) << SUB_BITS
+
+    def __init__(self) -> None:
+        """
+            fixed size log-linear histogram of latencies in nanoseconds
+        attributes:
+            count (int): number of recorded values
+            total (int): sum of recorded values
+            max (int): largest recorded value
+        """
+        self._counts: list[int] = [0] * self.BUCKETS
+        self.count: int = 0
+        self.total: int = 0
+        self.max: int = 0
+
+    def record(self, value: int) -> None:
+        if value < 0:
+            value = 0
+        shift = max(value.bit_length() - self.SUB_BITS - 1, 0)
+        self._counts[(shift << self.SUB_BITS) + (value >> shift)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p: float) -> int:
+        '''
+        percentile() - upper bound of the bucket holding the `p` quantile
+
+        @args
+            p (float): quantile between 0 and 1
+
+        @returns
+            int - latency in nanoseconds, 0 if nothing has been recorded
+        '''
+        if self.count == 0:
+            return 0
+        target = max(1, round(p * self.count))
+        seen = 0
+        for index, n in enumerate(self._counts):
+            seen += n
+            if seen >= target:
+                shift = max((index >> self.SUB_BITS) - 1, 0)
+                top = index - (shift << self.SUB_BITS)
+                return min(((top + 1) << shift) - 1, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        '''
+        summary() - count, mean, p50, p99 and max in microseconds
+        '''
+        return {
+            'count': self.count,
+            'mean_us': self.total / self.count / 1e3 if self.count else 0.,
+            'p50_us': self.percentile(.5) / 1e3,
+            'p99_us': self.percentile(.99) / 1e3,
+            'max_us': self.max / 1e3,
+        }
+
+
+class Tracer:
+    def __init__(self, enabled: bool=False) -> None:
+        """
+            per-process collection of latency histograms, one per pipeline stage.
+            every tracepoint records the time since the command was received (`Action.recv_ns`),
+            once per command and stage, so the difference between two stages is the time spent between them
+        attributes:
+            enabled (bool): tracepoints are no-ops while False
+        """
+        self.enabled: bool = enabled
+        self._histograms: dict[str, LatencyHistogram] = dict()
+        self._last: dict[str, int] = dict()
+
+    def mark(self, stage: str, since_ns: int) -> None:
+        '''
+        mark() - records a tracepoint
+
+        @args
+            stage (str): name of the pipeline stage
+            since_ns (int): `time.monotonic_ns()` when the command was received; 0 is ignored
+        '''
+        if not self.enabled or not since_ns or self._last.get(stage) == since_ns:
+            return
+        now = time.monotonic_ns()
+        self._last[stage] = since_ns
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            histogram = self._histograms[stage] = LatencyHistogram()
+        histogram.record(now - since_ns)
+
+    def attach(self, stage: str, histogram: LatencyHistogram) -> None:
+        '''
+        attach() - reports a histogram recorded elsewhere (e.g. control loop jitter) as `stage`
+        '''
+        self._histograms[stage] = histogram
+
+    def histogram(self, stage: str) -> LatencyHistogram | None:
+        return self._histograms.get(stage)
+
+    def report(self) -> dict:
+        '''
+        report() - summary of every stage traced in this process
+        '''
+        return {stage: histogram.summary() for stage, histogram in self._histograms.items()}
+
+    def dump(self, *_) -> None:
+        '''
+        dump() - logs the report of this process. also used as a signal handler
+        '''
+        name = multiprocessing.current_process().name
+        for stage, summary in self.report().items():
+            log.info(f"trace [{name}] {stage}: n={summary['count']} p50={summary['p50_us']:.1f}us p99={summary['p99_us']:.1f}us max={summary['max_us']:.1f}us")
+
+    def enable(self) -> None:
+        '''
+        enable() - turns tracing on, for this process and every process started from it
+        '''
+        self.enabled = True
+        os.environ['CLIENT_TRACE'] = '1'
+
+    def install(self, signum: int=signal.SIGUSR1) -> None:
+        '''
+        install() - dumps the report whenever `signum` is received. forked processes inherit the handler,
+            so `kill -USR1 -<process group>` dumps every process
+        '''
+        signal.signal(signum, self.dump)
+
+# tracer of this process, enabled in processes started by `run.py --trace`
+tracer = Tracer(enabled=bool(os.environ.get('CLIENT_TRACE')))
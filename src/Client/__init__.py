@@ -1,16 +1,25 @@
 from multiprocessing.managers import BaseManager, BaseProxy, MakeProxyType
+from multiprocessing import shared_memory
+import struct
+
+from Client.Shared.Action import Action, ACTION_STRUCT, TRAJECTORY_MAGIC, TRAJECTORY_MAX_SIZE
+from Client.Tracer import tracer
+
 
 class SharedResource:
     def __init__(self):
         self._action = None
         self._voltage = None
         self._current = None
+        self._wheels = None
+        self._ball = None
     
     def get_action(self):
         return self._action
     
     def set_action(self, action):
         self._action = action
+        tracer.mark('set_action', action.recv_ns)
 
     def get_voltage(self):
         return self._voltage
@@ -23,23 +32,221 @@ class SharedResource:
     
     def set_current(self, current):
         self._current = current
+
+    def get_wheels(self):
+        return self._wheels
+
+    def set_wheels(self, velocities, faults):
+        self._wheels = tuple(velocities), tuple(faults)
+
+    def get_ball(self):
+        return self._ball
+
+    def set_ball(self, present, changed_ns, seen_ns):
+        self._ball = present, changed_ns, seen_ns
     
-SharedResourceProxyBase = MakeProxyType('SharedResource', ('get_action', 'set_action', 'get_voltage', 'set_voltage', 'get_current', 'set_current'))
+SharedResourceProxyBase = MakeProxyType('SharedResource', ('get_action', 'set_action', 'get_voltage', 'set_voltage', 'get_current', 'set_current', 'get_wheels', 'set_wheels', 'get_ball', 'set_ball'))
 class SharedResourceProxy(SharedResourceProxyBase):
     def get_action(self):
         return self._callmethod('get_action')
     
-    def set_action(self):
-        return self._callmethod('set_action')
+    def set_action(self, action):
+        return self._callmethod('set_action', (action,))
     
     def get_voltage(self):
         return self._callmethod('get_voltage')
     
-    def set_voltage(self):
-        return self._callmethod('set_voltage')
+    def set_voltage(self, voltage):
+        return self._callmethod('set_voltage', (voltage,))
     
     def get_current(self):
         return self._callmethod('get_current')
     
-    def set_current(self):
-        return self._callmethod('set_current')
\ No newline at end of file
+    def set_current(self, current):
+        return self._callmethod('set_current', (current,))
+
+    def get_wheels(self):
+        return self._callmethod('get_wheels')
+
+    def set_wheels(self, velocities, faults):
+        return self._callmethod('set_wheels', (velocities, faults))
+
+    def get_ball(self):
+        return self._callmethod('get_ball')
+
+    def set_ball(self, present, changed_ns, seen_ns):
+        return self._callmethod('set_ball', (present, changed_ns, seen_ns))
+
+
+class SeqlockMailbox:
+    # header: sequence counter (uint64), payload length (uint32)
+    _SEQ = struct.Struct('<Q')
+    _LEN = struct.Struct('<I')
+    _HEADER_SIZE = _SEQ.size + _LEN.size
+
+    def __init__(self, capacity: int, name: str=None) -> None:
+        """
+            single-writer / multi-reader latest-value mailbox in shared memory.
+
+            the writer makes the sequence counter odd, copies the payload, then makes it even again.
+            readers copy the payload between two reads of the counter and retry if it was odd or changed,
+            so they never take a lock and never return a torn payload.
+        Args:
+            capacity (int): largest payload (in bytes) the mailbox can hold
+            name (str): name of an existing mailbox to attach to, None creates a new one
+        """
+        self._capacity: int = capacity
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=self._HEADER_SIZE + capacity)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self._buf = self._shm.buf
+
+    def write(self, data: bytes) -> None:
+        """
+            write() - publishes `data` as the latest value. only one process may write to a mailbox
+        """
+        n = len(data)
+        if n > self._capacity:
+            raise ValueError(f'payload of {n} bytes exceeds mailbox capacity of {self._capacity} bytes')
+        seq = self._SEQ.unpack_from(self._buf, 0)[0]
+        self._SEQ.pack_into(self._buf, 0, seq + 1) # odd: write in progress
+        self._LEN.pack_into(self._buf, self._SEQ.size, n)
+        self._buf[self._HEADER_SIZE:self._HEADER_SIZE + n] = data
+        self._SEQ.pack_into(self._buf, 0, seq + 2) # even: write complete
+
+    def read(self) -> tuple[int, bytes | None]:
+        """
+            read() - copies the latest value out of the mailbox
+
+            @returns
+                (int, bytes | None) - sequence number and payload; the payload is None until the first write
+        """
+        while True:
+            seq = self._SEQ.unpack_from(self._buf, 0)[0]
+            if seq & 1:
+                continue
+            n = self._LEN.unpack_from(self._buf, self._SEQ.size)[0]
+            data = bytes(self._buf[self._HEADER_SIZE:self._HEADER_SIZE + min(n, self._capacity)])
+            if self._SEQ.unpack_from(self._buf, 0)[0] == seq:
+                return seq, (data if seq else None)
+
+    def close(self) -> None:
+        self._buf = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.unlink()
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __getstate__(self):
+        return self._capacity, self._shm.name
+
+    def __setstate__(self, state):
+        capacity, name = state
+        self.__init__(capacity, name)
+
+
+class SharedMemoryResource:
+    _FLOAT = struct.Struct('<d')
+    # local receive time of the action, stored in front of the binary action or trajectory
+    _RECV_NS = struct.Struct('<q')
+    _ACTION_CAPACITY = _RECV_NS.size + max(ACTION_STRUCT.size, TRAJECTORY_MAX_SIZE)
+    # wheel velocities (rev/s) and fault codes of wheels 1-4
+    _WHEELS = struct.Struct('<4f4B')
+    # ball present, time.monotonic_ns() of its last change and of the last word from the arduino
+    _BALL = struct.Struct('<?qq')
+
+    def __init__(self):
+        """
+            drop-in replacement for `SharedResource` backed by `SeqlockMailbox`es instead of a `BaseManager`
+            server process. reads are a copy out of shared memory; there is no socket round trip or pickling.
+            each value must only be written by one process.
+        """
+        self._action = SeqlockMailbox(self._ACTION_CAPACITY)
+        self._action_buffer = bytearray(self._ACTION_CAPACITY)
+        self._voltage = SeqlockMailbox(self._FLOAT.size)
+        self._current = SeqlockMailbox(self._FLOAT.size)
+        self._wheels = SeqlockMailbox(self._WHEELS.size)
+        self._ball = SeqlockMailbox(self._BALL.size)
+        self._action_seq = 0
+        self._action_cache = None
+
+    def get_action(self):
+        seq, data = self._action.read()
+        if seq != self._action_seq: # only decode the action when it has changed
+            self._action_seq = seq
+            self._action_cache = None if data is None else self._unpack_action(data)
+        return self._action_cache
+
+    def set_action(self, action):
+        self._RECV_NS.pack_into(self._action_buffer, 0, action.recv_ns)
+        n = self._RECV_NS.size + action.pack_into(self._action_buffer, self._RECV_NS.size)
+        self._action.write(memoryview(self._action_buffer)[:n])
+        tracer.mark('set_action', action.recv_ns)
+
+    def get_voltage(self):
+        return self._get_float(self._voltage)
+
+    def set_voltage(self, voltage):
+        self._voltage.write(self._FLOAT.pack(voltage))
+
+    def get_current(self):
+        return self._get_float(self._current)
+
+    def set_current(self, current):
+        self._current.write(self._FLOAT.pack(current))
+
+    def get_wheels(self):
+        _, data = self._wheels.read()
+        if data is None:
+            return None
+        values = self._WHEELS.unpack(data)
+        return values[:4], values[4:]
+
+    def set_wheels(self, velocities, faults):
+        self._wheels.write(self._WHEELS.pack(*velocities, *faults))
+
+    def get_ball(self):
+        _, data = self._ball.read()
+        return None if data is None else self._BALL.unpack(data)
+
+    def set_ball(self, present, changed_ns, seen_ns):
+        self._ball.write(self._BALL.pack(present, changed_ns, seen_ns))
+
+    def close(self):
+        for mailbox in self._mailboxes():
+            mailbox.close()
+
+    def unlink(self):
+        for mailbox in self._mailboxes():
+            mailbox.unlink()
+
+    def _mailboxes(self):
+        return (self._action, self._voltage, self._current, self._wheels, self._ball)
+
+    def _unpack_action(self, data):
+        if data[self._RECV_NS.size] == TRAJECTORY_MAGIC:
+            from Client.Shared.Trajectory import Trajectory # numpy is only imported once a trajectory arrives
+            cls = Trajectory
+        else:
+            cls = Action
+        action = cls.unpack_from(data, self._RECV_NS.size)
+        action.recv_ns = self._RECV_NS.unpack_from(data, 0)[0]
+        return action
+
+    def _get_float(self, mailbox):
+        _, data = mailbox.read()
+        return None if data is None else self._FLOAT.unpack(data)[0]
+
+    def __getstate__(self):
+        return self._mailboxes()
+
+    def __setstate__(self, state):
+        self._action, self._voltage, self._current, self._wheels, self._ball = state
+        self._action_buffer = bytearray(self._ACTION_CAPACITY)
+        self._action_seq = 0
+        self._action_cache = None
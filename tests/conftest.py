@@ -0,0 +1,6 @@
+'''puts src/ (the Client package) and the repository root (dummy.py, replay.py) on the import path'''
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'src'), ROOT]
@@ -0,0 +1,24 @@
+from Client.Shared.Action import Action, ActionBatch, decode_datagram, MAX_DATAGRAM_SIZE
+import socket
+
+def test_full_batch_fits_the_receive_buffer():
+    # a batch for every robot id, sent over loopback and read the way the receivers read it
+    batch = ActionBatch([Action(robot_id=i, vx=float(i), vy=0., w=0., seq=i) for i in range(1, 256)])
+    data = batch.encode()
+    assert len(data) == MAX_DATAGRAM_SIZE
+
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(1.)
+        sender.sendto(data, receiver.getsockname())
+        message, _ = receiver.recvfrom(MAX_DATAGRAM_SIZE)
+    finally:
+        receiver.close()
+        sender.close()
+
+    assert message == data
+    action = decode_datagram(message, robot_id=255)
+    assert (action.robot_id, action.vx, action.seq) == (255, 255., 255)
+    assert [action.robot_id for action in ActionBatch.decode(message).actions] == list(range(1, 256))
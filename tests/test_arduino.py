@@ -0,0 +1,50 @@
+from Client import SharedResource
+from Client.Controllers.Arduino import ArduinoController
+from Client.Controllers.FakeArduino import FakeArduino
+from Client.Shared.Action import Action
+import threading
+import time
+
+def test_only_new_actions_count_as_saved():
+    arduino = FakeArduino().start()
+    controller = ArduinoController(SharedResource(), arduino.port, 115200, timeout=.1)
+    try:
+        first = Action(robot_id=1, dribble=1, seq=1)
+        first.recv_ns = time.monotonic_ns()
+        for _ in range(1000): # passes over the same action: one D is sent, nothing is saved
+            controller.do(first)
+        assert (controller.commands_sent, controller.commands_saved) == (1, 0)
+
+        second = Action(robot_id=1, dribble=1, seq=2)
+        second.recv_ns = time.monotonic_ns()
+        for _ in range(1000): # a new action repeating the dribble state saves one D
+            controller.do(second)
+        assert (controller.commands_sent, controller.commands_saved) == (1, 1)
+    finally:
+        controller._exit()
+        arduino.stop()
+
+def test_run_waits_for_new_actions():
+    arduino = FakeArduino().start()
+    resource = SharedResource()
+    controller = ArduinoController(resource, arduino.port, 115200, timeout=.1)
+    controller.gc_force_shutdown_event = shutdown = threading.Event()
+    passes = 0
+    do = controller.do
+    def counting_do(action):
+        nonlocal passes
+        passes += 1
+        do(action)
+    controller.do = counting_do
+    resource.set_action(Action(robot_id=1, seq=1))
+    runner = threading.Thread(target=controller.run)
+    try:
+        runner.start()
+        time.sleep(.2) # no new action: one pass every POLL_INTERVAL, not a spin
+        shutdown.set()
+        runner.join()
+        assert passes <= .2 / controller.POLL_INTERVAL + 2
+    finally:
+        shutdown.set()
+        controller._exit()
+        arduino.stop()
@@ -0,0 +1,14 @@
+from benchmarks.__main__ import compare, direction
+
+def test_every_direction_is_compared():
+    baseline = {'codec': {'us_per_op': 1., 'ops_per_s': 1e6, 'context_switches_per_s': 100., 'overruns': 0, 'processes': 4}}
+    results = {'codec': {'us_per_op': 2., 'ops_per_s': 5e5, 'context_switches_per_s': 200., 'overruns': 3, 'processes': 1}}
+    regressions = compare(results, baseline, .1)
+    assert sorted(line.split(':')[0] for line in regressions) == [
+        'codec.context_switches_per_s', 'codec.ops_per_s', 'codec.overruns', 'codec.us_per_op',
+    ]
+    assert compare(baseline, baseline, .1) == []
+
+def test_unknown_metrics_are_not_compared():
+    assert direction('something_new') is None
+    assert compare({'x': {'something_new': 2.}}, {'x': {'something_new': 1.}}, .1) == []
@@ -0,0 +1,24 @@
+from Client import SharedResource
+from Client.Controllers.Motor2 import MotorController2
+from Client.Controllers.Simulated import SimulatedTransport
+from Client.Shared.Action import Action
+import asyncio
+import pytest
+
+def test_run_stops_the_motors_when_the_loop_fails():
+    resource = SharedResource()
+    resource.set_action(Action(robot_id=1, vx=100., seq=1))
+    motor = MotorController2(resource, SimulatedTransport(MotorController2.SERVO_BUS_MAP, latency=0.))
+    stops = 0
+    make_stop = motor._make_stop
+    async def counting_make_stop():
+        nonlocal stops
+        stops += 1
+        await make_stop()
+    motor._make_stop = counting_make_stop
+    def failing_do(action):
+        raise RuntimeError('do failed')
+    motor.do = failing_do
+    with pytest.raises(RuntimeError):
+        asyncio.run(motor.run())
+    assert stops == 2 # once at startup, once on the way out
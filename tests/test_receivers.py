@@ -0,0 +1,28 @@
+from Client.Receivers.Async import LatestActionProtocol
+from Client.Receivers.SequenceFilter import SequenceFilter
+from Client.Shared.Action import Action
+import socket
+
+def test_wakeup_reads_at_most_max_reads():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        receiver.bind(('127.0.0.1', 0))
+        receiver.setblocking(False)
+        for seq in range(1, 101):
+            sender.sendto(Action(robot_id=1, vx=0., vy=0., w=0., seq=seq).encode(binary=True), receiver.getsockname())
+        published = []
+        protocol = LatestActionProtocol(receiver, 1, published.append, SequenceFilter(), max_reads=10)
+
+        data, addr = receiver.recvfrom(1024) # what the transport hands over
+        protocol.datagram_received(data, addr)
+        assert protocol.received == 10
+        assert [action.seq for action in published] == [10]
+
+        data, addr = receiver.recvfrom(1024) # the next pass of the event loop picks up the rest
+        protocol.datagram_received(data, addr)
+        assert protocol.received == 20
+        assert published[-1].seq == 20
+    finally:
+        receiver.close()
+        sender.close()
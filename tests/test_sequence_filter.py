@@ -0,0 +1,35 @@
+from Client.Receivers.SequenceFilter import SequenceFilter
+from Client.Shared.Action import Action
+
+SENDER = (('127.0.0.1', 50000), 1)
+MS = 1_000_000
+
+def action(seq: int, recv_ns: int) -> Action:
+    action = Action(robot_id=1, vx=0., vy=0., w=0., seq=seq)
+    action.recv_ns = recv_ns
+    return action
+
+def test_reordered_and_duplicate_actions_are_rejected():
+    f = SequenceFilter()
+    assert f.accept(SENDER, action(10, 1 * MS))
+    assert not f.accept(SENDER, action(9, 2 * MS))
+    assert not f.accept(SENDER, action(10, 3 * MS))
+    assert f.accept(SENDER, action(12, 4 * MS))
+    assert (f.reordered, f.duplicates, f.lost) == (1, 1, 1)
+
+def test_restart_below_the_window_after_an_idle_gap():
+    f = SequenceFilter(restart_window=1000, idle_timeout=.5)
+    for seq in range(1, 501): # 5s at 100Hz
+        assert f.accept(SENDER, action(seq, seq * 10 * MS))
+    # the sender restarts on the same address, 500 sequence numbers back, after a 1s gap
+    restart_ns = 500 * 10 * MS + 1000 * MS
+    assert f.accept(SENDER, action(1, restart_ns))
+    assert f.accept(SENDER, action(2, restart_ns + 10 * MS))
+    assert f.restarts == 1 and f.reordered == 0
+
+def test_idle_senders_are_forgotten():
+    f = SequenceFilter(idle_timeout=.5)
+    for port in range(100):
+        assert f.accept((('127.0.0.1', port), 1), action(1, 1 * MS))
+    assert f.accept(SENDER, action(1, 2000 * MS)) # one later action sweeps the idle ones
+    assert f.expired == 100 and len(f._last) == 1
@@ -0,0 +1,10 @@
+from Client.TraceLog import TraceLog, RECORD_STRUCT
+
+def test_records_unsigned_32_bit_sequence_numbers():
+    trace = TraceLog(capacity=4)
+    trace.enabled = True # no writer thread, the test drains the ring itself
+    event = trace.event('twist', 'seq={0} vx={1:.1f}')
+    trace.record(event, 0xFFFFFFFF, 1.)
+    [record] = RECORD_STRUCT.iter_unpack(trace.drain())
+    assert record[2] == 0xFFFFFFFF
+    assert trace.format(record).endswith('twist seq=4294967295 vx=1.0')